@@ -0,0 +1,40 @@
+"""Shared setup for the standalone benchmark scripts.
+
+Each script is run from the repository root, e.g.
+``python benchmarks/feed_projection.py``; it builds a throwaway test
+database so the development database is never touched.
+"""
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'blogicum'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test.utils import (  # noqa: E402
+    setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment)
+
+
+@contextmanager
+def test_database():
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def report(title, rows):
+    print(title)
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f'  {name:<{width}}  {value}')
@@ -0,0 +1,71 @@
+"""Bytes and memory a feed page costs with and without the card projection.
+
+Run as ``python benchmarks/feed_projection.py [--posts N] [--text-kb K]``.
+"""
+import argparse
+import tracemalloc
+
+from common import report, test_database
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from blog.models import Category, Location, Post
+from blog.views import get_posts_queryset
+
+PAGE_SIZE = 10
+
+
+def create_posts(n_posts, text_kb):
+    author = get_user_model().objects.create_user('bench', password='x' * 12)
+    category = Category.objects.create(
+        title='Категория', slug='bench', description='Описание ' * 500)
+    location = Location.objects.create(name='Место')
+    text = 'слово ' * (text_kb * 1024 // 12)
+    now = timezone.now()
+    for i in range(n_posts):
+        Post.objects.create(
+            title=f'Пост {i}', text=text, author=author, category=category,
+            location=location, pub_date=now - timezone.timedelta(minutes=i))
+
+
+def transferred_bytes(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return sum(len(str(value).encode()) for row in rows for value in row)
+
+
+def page_peak_memory(queryset):
+    tracemalloc.start()
+    list(queryset)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--text-kb', type=int, default=100)
+    args = parser.parse_args()
+
+    with test_database():
+        create_posts(args.posts, args.text_kb)
+        rows = []
+        for name, card_fields in (('полная выборка', False),
+                                  ('проекция карточки', True)):
+            page = get_posts_queryset(card_fields=card_fields)[:PAGE_SIZE]
+            rows.append((
+                name,
+                f'{transferred_bytes(page) / 1024:10.1f} KiB передано, '
+                f'{page_peak_memory(page) / 1024:10.1f} KiB пик памяти'
+            ))
+        report(f'Страница ленты из {PAGE_SIZE} постов по {args.text_kb} KB:',
+               rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Peak memory of accepting a large camera photo as a post image.
+
+Run as ``python benchmarks/upload_memory.py [--width W --height H]``; no
+database is needed. Each case runs in a fresh process, which reports the
+growth of its peak RSS (pixel buffers live outside the Python heap) and
+the tracemalloc peak of Python objects.
+"""
+import argparse
+import multiprocessing
+import resource
+import shutil
+import tempfile
+import tracemalloc
+
+from common import report
+
+from django import forms
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from PIL import Image
+
+from blog.images import normalize_upload
+
+
+def camera_photo(path, width, height):
+    image = Image.effect_noise((width, height), 64).convert('RGB')
+    image.save(path, 'JPEG', quality=90)
+
+
+def stream_upload(path):
+    """Copy the photo in chunks, as TemporaryFileUploadHandler does."""
+    upload = TemporaryUploadedFile('photo.jpg', 'image/jpeg', 0, None)
+    with open(path, 'rb') as source:
+        shutil.copyfileobj(source, upload)
+    upload.size = upload.tell()
+    return upload
+
+
+def django_validation(upload):
+    """Reference point: the checks forms.ImageField already makes."""
+    forms.ImageField().to_python(upload)
+
+
+def normalize(upload):
+    return normalize_upload(upload).read()
+
+
+def measure(case, path):
+    upload = stream_upload(path)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    case(upload)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    upload.close()
+    return (after - before) // 1024, python_peak // 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=6000)
+    parser.add_argument('--height', type=int, default=4000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    with tempfile.NamedTemporaryFile(suffix='.jpg') as photo:
+        # Peak RSS survives fork and exec, so keep the big noise image
+        # out of the parent as well.
+        with context.Pool(1) as pool:
+            pool.apply(camera_photo, (photo.name, args.width, args.height))
+        for case in (django_validation, normalize):
+            with context.Pool(1) as pool:
+                rss, python_peak = pool.apply(measure, (case, photo.name))
+            rows.append((
+                case.__name__,
+                f'пик RSS +{rss} МБ, объекты Python {python_peak} МБ'))
+    report(f'Приём фото {args.width}x{args.height}:', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Cost of a post/profile/category link: reverse() vs blog.links.
+
+Run as ``python benchmarks/url_building.py [--number N]``; no database is
+needed.
+"""
+import argparse
+import timeit
+
+from common import report
+
+from django.urls import reverse
+
+from blog.links import category_url, post_url, profile_url
+
+CASES = (
+    ('blog:post_detail', post_url, 4217),
+    ('blog:profile', profile_url, 'некто.user@blog'),
+    ('blog:category_posts', category_url, 'travel-notes'),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = []
+    for view_name, build, value in CASES:
+        assert build(value) == reverse(view_name, args=[value])
+        slow = timeit.timeit(
+            lambda: reverse(view_name, args=[value]), number=args.number)
+        fast = timeit.timeit(lambda: build(value), number=args.number)
+        rows.append((
+            view_name,
+            f'reverse() {slow / args.number * 1e6:6.2f} мкс, '
+            f'{build.__name__}() {fast / args.number * 1e6:6.2f} мкс, '
+            f'в {slow / fast:4.1f} раза быстрее'
+        ))
+    report(f'Построение ссылки, {args.number} вызовов:', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,16 @@
 from django.contrib import admin
 
+from .images import refresh_image_variants
 from .models import Category, Comment, Location, Post
 
 admin.site.register(Category)
 admin.site.register(Location)
-admin.site.register(Post)
 admin.site.register(Comment)
+
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            refresh_image_variants(obj)
+        super().save_model(request, obj, form, change)
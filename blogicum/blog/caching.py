@@ -0,0 +1,345 @@
+import hashlib
+import os
+import time
+from contextlib import suppress
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, quote_etag
+)
+from django.utils.http import parse_http_date_safe
+
+from .holes import fill_holes, start_shared_render
+from .references import categories, locations
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+POST_CARD_FRAGMENT = 'post_card'
+CONDITIONAL_HEADERS = (
+    'HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH',
+    'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_UNMODIFIED_SINCE',
+)
+REBUILD_POLL_INTERVAL = 0.05
+
+
+def tag_version_key(tag):
+    return f'blog:tag:{tag}'
+
+
+def get_tag_versions(tags, changed_since=None):
+    """Current version of every tag, starting a fresh one where missing.
+
+    Versions are ``time.time_ns()`` values. Tags invalidated after
+    ``changed_since`` get version 0, which never matches a current one,
+    so data read before that moment is not stamped as up to date.
+    """
+    keys = {tag_version_key(tag): tag for tag in tags}
+    versions = {
+        keys[key]: version for key, version in cache.get_many(keys).items()
+    }
+    if changed_since is not None:
+        versions = {
+            tag: 0 if version > changed_since else version
+            for tag, version in versions.items()
+        }
+    missing = {
+        tag_version_key(tag): time.time_ns()
+        for tag in tags if tag not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update({keys[key]: v for key, v in missing.items()})
+    return versions
+
+
+def invalidate_tags(*tags):
+    """Expire every cached page that depends on any of the tags."""
+    version = time.time_ns()
+    cache.set_many({tag_version_key(tag): version for tag in tags}, None)
+
+
+def post_card_version(post):
+    """Stamp of everything a feed card shows, for the card's cache key.
+
+    ``Post.updated_at`` covers the post and its comment count, the
+    reference versions its category and location, and the author's tag
+    version its author. Changes need no card deleted: the key moves on
+    and the old card expires.
+    """
+    author_tag = f'author:{post.author_id}'
+    return '{}:{}:{}:{}'.format(
+        post.updated_at.timestamp(), categories.version, locations.version,
+        get_tag_versions([author_tag])[author_tag])
+
+
+def post_card_key(post):
+    return make_template_fragment_key(
+        POST_CARD_FRAGMENT, [post.pk, post_card_version(post)])
+
+
+def post_tags(post):
+    tags = {
+        f'post:{post.pk}',
+        f'category:{post.category_id}',
+        f'author:{post.author_id}',
+    }
+    if post.location_id:
+        tags.add(f'location:{post.location_id}')
+    return tags
+
+
+def posts_tags(posts):
+    return set().union(*(post_tags(post) for post in posts))
+
+
+def tag_response(response, *tags):
+    response.cache_tags = getattr(response, 'cache_tags', set()) | set(tags)
+    return response
+
+
+def lock_path(lock_key):
+    """The lock file for ``lock_key``, or None where ``cache.add`` will do.
+
+    FileBasedCache.add() checks for the key and then writes it, so several
+    processes can take the same lock through it; with that backend locks
+    are files created with O_EXCL next to the cache entries instead.
+    """
+    config = settings.CACHES['default']
+    if config['BACKEND'] != FILE_CACHE:
+        return None
+    name = hashlib.md5(lock_key.encode()).hexdigest() + '.lock'
+    return os.path.join(config['LOCATION'], name)
+
+
+def lock_is_held(lock_key, timeout):
+    path = lock_path(lock_key)
+    if path is None:
+        return bool(cache.get(lock_key))
+    try:
+        return os.stat(path).st_mtime > time.time() - timeout
+    except FileNotFoundError:
+        return False
+
+
+def acquire_lock(lock_key, timeout):
+    """Take the lock unless somebody else holds it; True if taken.
+
+    The lock lapses after ``timeout`` seconds, so that a crashed holder
+    does not keep it forever.
+    """
+    path = lock_path(lock_key)
+    if path is None:
+        return cache.add(lock_key, True, timeout)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for _ in range(2):
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            if lock_is_held(lock_key, timeout):
+                return False
+            with suppress(FileNotFoundError):
+                os.unlink(path)
+    return False
+
+
+def release_lock(lock_key):
+    path = lock_path(lock_key)
+    if path is None:
+        cache.delete(lock_key)
+        return
+    with suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+def single_flight(key, build, timeout, stale_timeout=0,
+                  lock_timeout=None, is_fresh=None):
+    """Read ``key`` from the cache, letting one caller at a time rebuild it.
+
+    ``build()`` returns the value to store, or None if it must not be
+    cached; a stale copy is then dropped too, so that nobody keeps
+    getting a page that has been unpublished or deleted. An entry is
+    fresh for ``timeout`` seconds (and while ``is_fresh(value)`` holds),
+    then may be served stale for up to ``stale_timeout`` more. Whoever
+    takes the rebuild lock recomputes the value; everybody else gets the
+    stale copy or, without one, waits up to ``lock_timeout`` seconds for
+    the new value before building it themselves.
+    """
+    lock_timeout = lock_timeout or settings.BLOG_CACHE_LOCK_TIMEOUT
+    entry = cache.get(key)
+    if entry and entry['fresh_until'] > time.time() and (
+            is_fresh is None or is_fresh(entry['value'])):
+        return entry['value']
+
+    lock_key = f'{key}:rebuild'
+    if not acquire_lock(lock_key, lock_timeout):
+        if entry:
+            return entry['value']
+        deadline = time.monotonic() + lock_timeout
+        while (lock_is_held(lock_key, lock_timeout)
+               and time.monotonic() < deadline):
+            time.sleep(REBUILD_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry:
+            return entry['value']
+        return build()
+
+    try:
+        value = build()
+        if value is None:
+            cache.delete(key)
+        else:
+            cache.set(key, {
+                'value': value,
+                'fresh_until': time.time() + timeout,
+            }, timeout + stale_timeout)
+        return value
+    finally:
+        release_lock(lock_key)
+
+
+def page_cache_key(request):
+    variant = 'user' if request.user.is_authenticated else 'anonymous'
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'blog:page:{variant}:{path}'
+
+
+def user_etag(request, etag):
+    """Validator of a shared page once its holes are filled for the reader."""
+    return hashlib.md5(f'{etag}:{request.user.pk}'.encode()).hexdigest()
+
+
+def private_response(response):
+    """Keep the response out of the shared page cache."""
+    response.cache_private = True
+    return response
+
+
+def require_revalidation(request, response):
+    """Keep browsers from reusing an HTML page without asking first.
+
+    A page with Last-Modified but no Cache-Control may be reused for a
+    tenth of its age without any request.
+    """
+    if request.user.is_authenticated:
+        patch_cache_control(response, no_cache=True, private=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional_response(request, response):
+    """Answer a conditional request from the response's own validators."""
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(
+            response.get('Last-Modified', '')),
+        response=response,
+    )
+
+
+def shared_page_response(request, page):
+    response = HttpResponse(
+        fill_holes(page['content'], page['marker'], request),
+        content_type=page['content_type'])
+    etag = page['etag'] and quote_etag(user_etag(request, page['etag']))
+    if etag:
+        response['ETag'] = etag
+    if page['last_modified']:
+        response['Last-Modified'] = page['last_modified']
+    require_revalidation(request, response)
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=parse_http_date_safe(page['last_modified'] or ''),
+        response=response,
+    )
+
+
+def cache_shared_page(view=None, *, timeout=None, stale_timeout=None,
+                      bypass=None):
+    """Render the view's HTML once and serve it to every reader.
+
+    The body is built with holes (see ``blog.holes``) in place of the
+    header, CSRF tokens and owner-only controls, which are filled in per
+    request. Logged-in readers share a body of their own, as their pager
+    differs, and only when BLOG_SHARE_PAGES_WITH_USERS is on. Requests
+    for which ``bypass(request, *args, **kwargs)`` is true and responses
+    passed to ``private_response`` skip the cache.
+
+    The view marks its response with ``tag_response``; a cached page is
+    dropped as soon as any of its tags is passed to ``invalidate_tags``.
+    Expired or invalidated pages are rebuilt by a single request while
+    concurrent ones get the previous copy; ``timeout`` and
+    ``stale_timeout`` override the BLOG_PAGE_CACHE_* settings per view.
+    Apply it outside ``condition`` so cached pages keep their validators;
+    conditional requests are answered here, after the full page has been
+    rendered or read from the cache.
+    """
+    if view is None:
+        return partial(
+            cache_shared_page,
+            timeout=timeout, stale_timeout=stale_timeout, bypass=bypass)
+
+    def tags_are_current(page):
+        return get_tag_versions(page['tags']) == page['tags']
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+                and not settings.BLOG_SHARE_PAGES_WITH_USERS
+                or bypass and bypass(request, *args, **kwargs)):
+            return view(request, *args, **kwargs)
+
+        response = marker = None
+
+        def build():
+            nonlocal response, marker
+            # Versions are compared against the start of the render, so
+            # an invalidation landing mid-render leaves the page stale.
+            started = time.time_ns()
+            marker = start_shared_render(request)
+            # A 304 from the view would leave nothing to store.
+            conditions = {
+                header: request.META.pop(header)
+                for header in CONDITIONAL_HEADERS if header in request.META
+            }
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                del request.hole_marker
+                request.META.update(conditions)
+            if (response.status_code != 200 or response.streaming
+                    or response.cookies
+                    or getattr(response, 'cache_private', False)):
+                return None
+            return {
+                'content': response.content.decode(response.charset),
+                'content_type': response['Content-Type'],
+                'marker': marker,
+                'etag': getattr(response, 'shared_etag', None),
+                'last_modified': response.get('Last-Modified'),
+                'tags': get_tag_versions(
+                    getattr(response, 'cache_tags', set()), started),
+            }
+
+        page = single_flight(
+            page_cache_key(request), build,
+            timeout=timeout or settings.BLOG_PAGE_CACHE_TIMEOUT,
+            stale_timeout=(
+                settings.BLOG_PAGE_CACHE_STALE_TIMEOUT
+                if stale_timeout is None else stale_timeout),
+            is_fresh=tags_are_current,
+        )
+        if page is not None:
+            return shared_page_response(request, page)
+        if not response.streaming:
+            response.content = fill_holes(
+                response.content.decode(response.charset), marker, request)
+        return conditional_response(request, response)
+    return wrapper
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .caching import FILE_CACHE
+
+# Backends whose contents no other process can see.
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Invalidations and rebuild locks only work through a shared cache."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            'Кеш по умолчанию не общий для процессов.',
+            hint=(
+                'Страницы, карточки, счётчики и справочники блога '
+                'сбрасываются через общий кеш; с %s изменения, сделанные в '
+                'одном процессе, не видны остальным. Настройте Redis или '
+                'Memcached.' % backend.rsplit('.', 1)[-1]
+            ),
+            id='blog.W001',
+        )]
+    if backend == FILE_CACHE:
+        return [Warning(
+            'Кеш по умолчанию не умеет атомарно добавлять ключи.',
+            hint=(
+                'Устаревшую страницу или счётчик перестраивает один процесс, '
+                'взявший блокировку. FileBasedCache.add() не атомарен, '
+                'поэтому блокировки хранятся в файлах рядом с кешем и '
+                'действуют только на одном сервере. Настройте Redis или '
+                'Memcached.'
+            ),
+            id='blog.W001',
+        )]
+    return []
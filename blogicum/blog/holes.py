@@ -0,0 +1,66 @@
+"""Per-reader fragments punched into pages shared through the cache.
+
+While a page is rendered for the shared cache, ``request.hole_marker``
+holds a random marker and the ``page_holes`` template tags emit HTML
+comments carrying it instead of the reader's own pieces. ``fill_holes``
+then puts those pieces into the cached body for every request.
+"""
+import re
+import secrets
+
+from django.template.backends.utils import csrf_input
+from django.template.loader import render_to_string
+
+
+def start_shared_render(request):
+    request.hole_marker = secrets.token_hex(8)
+    return request.hole_marker
+
+
+def get_marker(request):
+    return getattr(request, 'hole_marker', None)
+
+
+def include_hole(request, template_name):
+    marker = get_marker(request)
+    if marker is None:
+        return render_to_string(template_name, request=request)
+    return f'<!--{marker}:include:{template_name}-->'
+
+
+def csrf_hole(request):
+    marker = get_marker(request)
+    if marker is None:
+        return csrf_input(request)
+    return f'<!--{marker}:csrf:-->'
+
+
+def owner_section(request, owner_id, render):
+    """Keep the output of ``render()`` only for the reader ``owner_id``."""
+    marker = get_marker(request)
+    if not request.user.is_authenticated:
+        return ''
+    if marker is None:
+        return render() if request.user.pk == owner_id else ''
+    return f'<!--{marker}:owner:{owner_id}-->{render()}<!--{marker}:/owner-->'
+
+
+def fill_holes(content, marker, request):
+    """Render the reader's pieces into a body built with ``marker``."""
+    pattern = re.compile(
+        rf'<!--{marker}:owner:(?P<owner>\d+)-->(?P<body>.*?)'
+        rf'<!--{marker}:/owner-->'
+        rf'|<!--{marker}:(?P<kind>include|csrf):(?P<arg>[^>]*)-->',
+        re.DOTALL
+    )
+
+    def fill(match):
+        if match['owner']:
+            if str(request.user.pk) == match['owner']:
+                return match['body']
+            return ''
+        if match['kind'] == 'include':
+            return render_to_string(match['arg'], request=request)
+        return csrf_input(request)
+
+    return pattern.sub(fill, content)
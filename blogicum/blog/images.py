@@ -0,0 +1,331 @@
+"""Resized copies of post images for feeds and post pages."""
+import posixpath
+from base64 import b64encode
+from io import BytesIO
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageCms, ImageOps
+
+VARIANTS_DIR = 'post_images/variants'
+
+# Longer side, in pixels, of the blurry preview shown while an image loads.
+PLACEHOLDER_SIZE = 16
+
+
+# Formats offered alongside JPEG and PNG through <picture>, best first:
+# the Pillow encoder and the MIME type of each format.
+MODERN_FORMATS = {
+    'avif': ('AVIF', 'image/avif'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+
+class ImageVariant(NamedTuple):
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+class ImageSource(NamedTuple):
+    type: str
+    srcset: str
+
+
+def modern_formats():
+    """The BLOG_IMAGE_FORMATS this Pillow build can write."""
+    Image.init()
+    return [
+        image_format for image_format in settings.BLOG_IMAGE_FORMATS
+        if MODERN_FORMATS[image_format][0] in Image.SAVE
+    ]
+
+
+def convert_mode(image, mode):
+    """Convert ``image`` to ``mode``, turning profiled colours into sRGB.
+
+    A colour profile describes the source mode only (a CMYK profile is
+    wrong on RGB pixels), so the result carries none and browsers read
+    it as sRGB.
+    """
+    profile = image.info.get('icc_profile')
+    converted = None
+    if profile:
+        try:
+            converted = ImageCms.profileToProfile(
+                image, ImageCms.ImageCmsProfile(BytesIO(profile)),
+                ImageCms.createProfile('sRGB'), outputMode=mode)
+        except (ImageCms.PyCMSError, OSError, ValueError):
+            pass
+    if converted is None:
+        converted = image.convert(mode)
+    converted.info.pop('icc_profile', None)
+    return converted
+
+
+def encode_image(image, image_format=None):
+    """Encode ``image`` in a modern format, or else as JPEG or PNG.
+
+    Without ``image_format`` images with transparency become PNG and the
+    rest JPEG. Only the colour profile is carried over, and only while
+    the mode stays the same, so EXIF and other metadata are dropped.
+    Returns the encoded bytes and the extension.
+    """
+    buffer = BytesIO()
+    transparent = (
+        image.mode in ('RGBA', 'LA') or 'transparency' in image.info)
+    if image_format is not None:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = convert_mode(image, 'RGBA' if transparent else 'RGB')
+        image.save(
+            buffer, MODERN_FORMATS[image_format][0],
+            quality=settings.BLOG_IMAGE_QUALITY,
+            icc_profile=image.info.get('icc_profile'))
+        extension = f'.{image_format}'
+    elif transparent:
+        image.save(
+            buffer, 'PNG', optimize=True,
+            icc_profile=image.info.get('icc_profile'))
+        extension = '.png'
+    else:
+        if image.mode != 'RGB':
+            image = convert_mode(image, 'RGB')
+        image.save(
+            buffer, 'JPEG', quality=settings.BLOG_IMAGE_QUALITY,
+            optimize=True, progressive=True,
+            icc_profile=image.info.get('icc_profile'))
+        extension = '.jpg'
+    return buffer.getvalue(), extension
+
+
+def save_image(image, storage, name, image_format=None):
+    content, extension = encode_image(image, image_format)
+    return storage.save(name + extension, ContentFile(content))
+
+
+def describe_image(image, storage, name, formats=()):
+    """Save ``image`` and its copies in ``formats``, for image_variants."""
+    description = {
+        'name': save_image(image, storage, name),
+        'width': image.width,
+        'height': image.height,
+    }
+    add_formats(description, image, storage, name, formats)
+    return description
+
+
+def placeholder_uri(image):
+    """A tiny copy of ``image`` as a data: URI, small enough to inline."""
+    image = image.copy()
+    image.info.pop('icc_profile', None)
+    image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    content, extension = encode_image(image)
+    mime_type = 'image/png' if extension == '.png' else 'image/jpeg'
+    return f'data:{mime_type};base64,{b64encode(content).decode()}'
+
+
+def add_formats(description, image, storage, name, formats):
+    formats = {
+        image_format: save_image(image, storage, name, image_format)
+        for image_format in formats
+    }
+    if formats:
+        description['formats'] = formats
+
+
+def normalize_upload(upload):
+    """Check an uploaded image against the limits and re-encode it.
+
+    Size and dimensions are checked before any pixel data is decoded, so
+    oversized files and decompression bombs are rejected cheaply. The
+    result is turned upright, capped at BLOG_IMAGE_MAX_SIDE pixels on its
+    longer side and stripped of EXIF.
+    """
+    if upload.size > settings.BLOG_IMAGE_MAX_BYTES:
+        raise ValidationError(
+            'Файл больше %(limit)s МБ.',
+            code='file_too_large',
+            params={'limit': settings.BLOG_IMAGE_MAX_BYTES // 2 ** 20},
+        )
+    upload.seek(0)
+    with Image.open(upload) as image:
+        width, height = image.size
+        if width * height > settings.BLOG_IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                'Изображение больше %(limit)s мегапикселей.',
+                code='too_many_pixels',
+                params={'limit': settings.BLOG_IMAGE_MAX_PIXELS // 10 ** 6},
+            )
+        max_side = settings.BLOG_IMAGE_MAX_SIDE
+        longer = max(width, height)
+        if max_side < longer:
+            # Let the JPEG decoder skip detail the capped copy won't keep.
+            image.draft('RGB', (
+                width * max_side // longer, height * max_side // longer))
+        # Shrink first so that turning the photo upright copies fewer
+        # pixels; the cap is on the longer side either way round.
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        ImageOps.exif_transpose(image, in_place=True)
+        content, extension = encode_image(image)
+    stem = posixpath.splitext(posixpath.basename(upload.name))[0]
+    return ContentFile(content, name=stem + extension)
+
+
+def build_variants(field_file, formats=()):
+    """Write every BLOG_IMAGE_VARIANTS size of an uploaded image.
+
+    Returns the ``Post.image_variants`` description: name, width and
+    height of the original and of each variant, with the names of their
+    copies in the modern ``formats``, plus ``'placeholder'`` and the list
+    of ``'formats'`` made. Encoding AVIF takes seconds, so uploads are
+    saved without modern formats and build_image_variants adds them.
+    Variants never upscale; those that would not be smaller than the
+    original point to it.
+    """
+    storage = field_file.storage
+    stem = posixpath.splitext(posixpath.basename(field_file.name))[0]
+    sizes = settings.BLOG_IMAGE_VARIANTS
+    with field_file.open('rb') as file, Image.open(file) as image:
+        width, height = image.size
+        variants = {'original': {
+            'name': field_file.name, 'width': width, 'height': height}}
+        largest = max(sizes.values())
+        if largest < width:
+            # Let the JPEG decoder skip detail no variant needs.
+            image.draft('RGB', (largest, height * largest // width))
+        source = image
+        for variant, max_width in sorted(
+                sizes.items(), key=lambda item: -item[1]):
+            if max_width >= width:
+                # Not drafted: the image is still at its full size.
+                if 'formats' not in variants['original']:
+                    add_formats(
+                        variants['original'], image, storage,
+                        posixpath.join(VARIANTS_DIR, f'{stem}_original'),
+                        formats)
+                variants[variant] = variants['original']
+                continue
+            source = source.copy()
+            source.thumbnail((max_width, height), Image.Resampling.LANCZOS)
+            variants[variant] = describe_image(
+                source, storage,
+                posixpath.join(VARIANTS_DIR, f'{stem}_{variant}'), formats)
+        # Kept beside the sizes: variants may share the original's dict.
+        variants['placeholder'] = placeholder_uri(source)
+    variants['formats'] = list(formats)
+    return variants
+
+
+def image_names(variants):
+    """Names of every stored file an ``image_variants`` value uses."""
+    names = set()
+    for description in variants.values():
+        if not isinstance(description, dict):
+            continue
+        names.add(description['name'])
+        names.update(description.get('formats', {}).values())
+    return names
+
+
+def referenced_images(posts):
+    """Names of every stored file the given posts use."""
+    names = set()
+    for image, variants in posts.exclude(image='').values_list(
+            'image', 'image_variants').iterator():
+        names.add(image)
+        names |= image_names(variants)
+    return names
+
+
+def refresh_image_variants(post):
+    """Store the post's new image and regenerate its variants.
+
+    Call before saving a post whose image changed. Files the post stops
+    using are left for the collect_unused_images command.
+    """
+    previous = post.image_variants
+    if not post.image:
+        post.image_variants = {}
+    else:
+        if not post.image._committed:
+            post.image.save(post.image.name, post.image.file, save=False)
+        original = previous.get('original', {}).get('name')
+        if post.image.name != original:
+            post.image_variants = build_variants(post.image)
+
+
+def get_image_variant(post, variant):
+    """URL and size of a variant, falling back to the original upload."""
+    if not post.image:
+        return None
+    description = post.image_variants.get(variant)
+    if description is None:
+        return ImageVariant(post.image.url)
+    return ImageVariant(
+        post.image.storage.url(description['name']),
+        description['width'], description['height'])
+
+
+def get_image_placeholder(post):
+    """The data: URI to show while the post's image loads, if any."""
+    if not post.image:
+        return None
+    return post.image_variants.get('placeholder')
+
+
+def variant_descriptions(post):
+    """Descriptions of the post's BLOG_IMAGE_VARIANTS that were made."""
+    return [
+        post.image_variants[variant]
+        for variant in settings.BLOG_IMAGE_VARIANTS
+        if isinstance(post.image_variants.get(variant), dict)
+    ]
+
+
+def width_srcset(storage, descriptions, image_format=None):
+    """A ``w`` descriptor srcset, or None if a description lacks the format.
+
+    Variants that share the original are listed once.
+    """
+    widths = {}
+    for description in descriptions:
+        name = (
+            description['name'] if image_format is None
+            else description.get('formats', {}).get(image_format))
+        if name is None:
+            return None
+        widths[name] = description['width']
+    return ', '.join(
+        f'{storage.url(name)} {width}w'
+        for name, width in sorted(widths.items(), key=lambda item: item[1])
+    )
+
+
+def get_image_srcset(post):
+    """The ``srcset`` of every variant of the post's image, by width."""
+    if not post.image:
+        return ''
+    descriptions = variant_descriptions(post)
+    if not descriptions:
+        return ''
+    return width_srcset(post.image.storage, descriptions)
+
+
+def get_image_sources(post):
+    """``<source>`` type and srcset for each modern format of the image.
+
+    A format is only offered when every variant has a copy in it.
+    """
+    if not post.image:
+        return []
+    descriptions = variant_descriptions(post)
+    if not descriptions:
+        return []
+    sources = []
+    for image_format, (_, mime_type) in MODERN_FORMATS.items():
+        srcset = width_srcset(post.image.storage, descriptions, image_format)
+        if srcset is not None:
+            sources.append(ImageSource(mime_type, srcset))
+    return sources
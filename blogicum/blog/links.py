@@ -0,0 +1,58 @@
+"""URLs of posts, categories and profiles without a resolver walk per link.
+
+Each URL name is reversed once per script prefix with a marker argument;
+the result is split around the marker into a prefix and a suffix that
+later calls glue around the quoted value.
+"""
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, reverse
+
+# Characters reverse() leaves unquoted in URL arguments.
+URL_SAFE_CHARS = "!$&'()*+,;=/~:@"
+# Fits the int, slug and str converters alike.
+MARKER = '9182736450'
+SEGMENT_RE = re.compile(r'[^/]+')
+
+
+@lru_cache(maxsize=None)
+def url_template(view_name, script_prefix):
+    head, marker, tail = reverse(view_name, args=[MARKER]).partition(MARKER)
+    if not marker or MARKER in tail:
+        raise ValueError(
+            f'Адрес {view_name} нельзя разбить по маркеру {MARKER}.')
+    return head, tail
+
+
+@receiver(setting_changed)
+def reset_url_templates(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        url_template.cache_clear()
+
+
+def build_url(view_name, value):
+    """Same as ``reverse(view_name, args=[value])`` for a single segment.
+
+    Values the cheap check cannot vouch for go through ``reverse()``.
+    """
+    value = str(value)
+    if not SEGMENT_RE.fullmatch(value):
+        return reverse(view_name, args=[value])
+    head, tail = url_template(view_name, get_script_prefix())
+    return head + quote(value, safe=URL_SAFE_CHARS) + tail
+
+
+def post_url(post_id):
+    return build_url('blog:post_detail', post_id)
+
+
+def category_url(slug):
+    return build_url('blog:category_posts', slug)
+
+
+def profile_url(username):
+    return build_url('blog:profile', username)
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет Post.excerpt и Post.excerpt_html по тексту публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько публикаций обновлять за один запрос.'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='refresh_all',
+            help='Пересчитать все публикации, а не только без начала текста.'
+        )
+
+    def handle(self, *args, batch_size=500, refresh_all=False, **options):
+        posts = Post.objects.only('text', 'excerpt', 'excerpt_html')
+        if not refresh_all:
+            posts = posts.filter(excerpt_html='')
+        batch, updated = [], 0
+        for post in posts.order_by('pk').iterator(chunk_size=batch_size):
+            post.refresh_excerpt()
+            post.updated_at = timezone.now()
+            batch.append(post)
+            if len(batch) == batch_size:
+                updated += self.save_batch(batch)
+        updated += self.save_batch(batch)
+        self.stdout.write(f'Обновлено публикаций: {updated}')
+
+    @staticmethod
+    def save_batch(batch):
+        Post.objects.bulk_update(
+            batch, ['excerpt', 'excerpt_html', 'updated_at'])
+        updated = len(batch)
+        batch.clear()
+        return updated
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from blog.caching import invalidate_tags
+from blog.images import build_variants, modern_formats
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Создаёт уменьшенные копии фото публикаций, их копии в '
+            'форматах AVIF и WebP, размеры и превью для показа во время '
+            'загрузки. Фото сохраняются без AVIF и WebP, чтобы не '
+            'задерживать публикацию: запускайте команду периодически.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='refresh_all',
+            help='Пересоздать копии всех фото, а не только недостающие.'
+        )
+
+    def handle(self, *args, refresh_all=False, **options):
+        formats = modern_formats()
+        posts = Post.objects.exclude(image='').only('image', 'image_variants')
+        if not refresh_all:
+            posts = posts.filter(
+                Q(image_variants__placeholder__isnull=True)
+                | Q(image_variants__formats__isnull=True)
+                | ~Q(image_variants__formats=formats)
+            )
+        updated = failed = 0
+        for post in posts.order_by('pk').iterator():
+            try:
+                variants = build_variants(post.image, formats)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'Публикация {post.pk}: {error}')
+                continue
+            # Leave the post alone if its image was replaced meanwhile.
+            if Post.objects.filter(pk=post.pk, image=post.image.name).update(
+                    image_variants=variants, updated_at=timezone.now()):
+                invalidate_tags(f'post:{post.pk}')
+                updated += 1
+        self.stdout.write(
+            f'Обновлено публикаций: {updated}, с ошибками: {failed}')
@@ -0,0 +1,54 @@
+import posixpath
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.images import referenced_images
+from blog.models import Post
+
+
+def walk(storage, directory):
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for subdirectory in directories:
+        yield from walk(storage, posixpath.join(directory, subdirectory))
+
+
+class Command(BaseCommand):
+    help = ('Удаляет файлы фото публикаций, на которые не ссылается '
+            'ни одна публикация.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, сколько файлов можно удалить.'
+        )
+
+    def handle(self, *args, dry_run=False, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        if not storage.exists(field.upload_to):
+            return
+        cutoff = timezone.now() - timezone.timedelta(
+            seconds=settings.BLOG_UNUSED_IMAGE_GRACE)
+
+        def is_old(name):
+            return storage.get_modified_time(name) < cutoff
+
+        # Files are listed before references are read, so an upload that
+        # lands in between is either too recent or already referenced.
+        candidates = [
+            name for name in walk(storage, field.upload_to) if is_old(name)]
+        referenced = referenced_images(Post.objects)
+        unused = [name for name in candidates if name not in referenced]
+        if not dry_run:
+            for name in unused:
+                if is_old(name):
+                    storage.delete(name)
+        self.stdout.write(
+            f'Неиспользуемых файлов: {len(unused)}'
+            + (' (не удалено)' if dry_run else '')
+        )
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.scheduling import next_scheduled_publication, publish_due_posts
+
+
+class Command(BaseCommand):
+    help = ('Публикует отложенные посты, время публикации которых '
+            'наступило. С --loop работает постоянно и просыпается '
+            'точно к следующей публикации.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать следующих публикаций.'
+        )
+        parser.add_argument(
+            '--max-sleep',
+            type=float,
+            default=60,
+            help='Наибольшая пауза между проверками, в секундах: за это '
+                 'время замечаются посты, отложенные уже после проверки.'
+        )
+
+    def handle(self, *args, loop=False, max_sleep=60, **options):
+        while True:
+            post_ids = publish_due_posts()
+            if post_ids:
+                self.stdout.write(f'Опубликовано постов: {len(post_ids)}')
+            if not loop:
+                return
+            time.sleep(self.seconds_until_next(max_sleep))
+
+    @staticmethod
+    def seconds_until_next(max_sleep):
+        next_at = next_scheduled_publication()
+        if next_at is None:
+            return max_sleep
+        delay = (next_at - timezone.now()).total_seconds()
+        return min(max(delay, 0), max_sleep)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает Post.comment_count по таблице комментариев '
+            'и исправляет расхождения.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать публикации с неверным счётчиком.'
+        )
+
+    def handle(self, *args, dry_run=False, **options):
+        actual = Coalesce(Subquery(
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by().values('post').annotate(total=Count('pk'))
+            .values('total')
+        ), 0)
+        drifted = list(
+            Post.objects.annotate(actual=actual)
+            .exclude(comment_count=F('actual'))
+            .values_list('pk', flat=True)
+        )
+        if not dry_run and drifted:
+            Post.objects.filter(pk__in=drifted).update(
+                comment_count=actual, updated_at=timezone.now())
+        self.stdout.write(
+            f'Публикаций с неверным счётчиком: {len(drifted)}'
+            + (' (не исправлено)' if dry_run else '')
+        )
@@ -0,0 +1,139 @@
+"""Serving uploaded media, from Python or through the web server."""
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse, Http404, HttpResponse, StreamingHttpResponse
+)
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+# Names given by ContentAddressedStorage: the file's SHA-256 in hex.
+HASHED_NAME = re.compile(r'^(?P<digest>[0-9a-f]{64})\.\w+$')
+RANGE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+RANGE_CHUNK_SIZE = 64 * 1024
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def media_etag(hashed, file_stat):
+    if hashed:
+        return quote_etag(hashed['digest'])
+    return quote_etag(f'{file_stat.st_size:x}-{file_stat.st_mtime_ns:x}')
+
+
+def parse_range(header, size):
+    """The (start, end) a single-range ``Range`` header asks for.
+
+    Returns None for headers to ignore, such as several ranges, and
+    raises ValueError when the range lies outside the file.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or not (match['start'] or match['end']):
+        return None
+    if not match['start']:
+        length = int(match['end'])
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(match['start'])
+    end = min(int(match['end']), size - 1) if match['end'] else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def read_range(path, start, end):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def offload_response(name, path, content_type):
+    """Let the web server send the file; see BLOG_MEDIA_OFFLOAD."""
+    response = HttpResponse(content_type=content_type)
+    if settings.BLOG_MEDIA_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.BLOG_MEDIA_ACCEL_PREFIX + quote(name))
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def file_response(request, path, size, content_type, etag):
+    header = request.headers.get('Range')
+    # A stale If-Range asks for the whole file instead.
+    if header and request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = parse_range(header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(path, start, end) if request.method == 'GET'
+                else (), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+            return response
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = size
+        return response
+    return FileResponse(open(path, 'rb'), content_type=content_type)
+
+
+@require_safe
+def serve_media(request, path):
+    """Send a file from MEDIA_ROOT with validators and cache headers.
+
+    Files under content-hash names never change, so browsers may keep
+    them for a year; others are kept for BLOG_MEDIA_MAX_AGE seconds.
+    Byte ranges are supported, and the file itself can be handed to the
+    web server with BLOG_MEDIA_OFFLOAD.
+    """
+    name = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = default_storage.path(name)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404
+    hashed = HASHED_NAME.match(posixpath.basename(name))
+    etag = media_etag(hashed, file_stat)
+    last_modified = int(file_stat.st_mtime)
+    content_type = (
+        mimetypes.guess_type(name)[0] or 'application/octet-stream')
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if settings.BLOG_MEDIA_OFFLOAD:
+            response = offload_response(name, full_path, content_type)
+        else:
+            response = file_response(
+                request, full_path, file_stat.st_size, content_type, etag)
+    if response.status_code in (200, 206, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = (
+            IMMUTABLE if hashed
+            else f'public, max-age={settings.BLOG_MEDIA_MAX_AGE}')
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:40
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def hide_scheduled_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(
+        is_visible=True, pub_date__gt=timezone.now()
+    ).update(is_visible=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='is_visible',
+            field=models.BooleanField(default=False, editable=False, help_text='Публикация и её категория опубликованы, время публикации наступило.', verbose_name='Виден читателям'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_visible', False)), fields=['pub_date'], name='post_scheduled_idx'),
+        ),
+        migrations.RunPython(hide_scheduled_posts, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,14 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.template.defaultfilters import linebreaks_filter
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from .images import (
+    get_image_placeholder, get_image_sources, get_image_srcset,
+    get_image_variant
+)
+from .links import category_url, post_url
 
 
 User = get_user_model()
@@ -10,6 +19,10 @@ class TimeStampedModel(models.Model):
         auto_now_add=True,
         verbose_name='Добавлено'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено'
+    )
     is_published = models.BooleanField(
         default=True,
         verbose_name='Опубликовано',
@@ -51,8 +64,14 @@ class Category(TimeStampedModel):
     def __str__(self):
         return self.title[:20]
 
+    def get_absolute_url(self):
+        return category_url(self.slug)
+
 
 class Post(TimeStampedModel):
+    EXCERPT_WORDS = 10
+    EXCERPT_MAX_LENGTH = 256
+
     title = models.CharField(max_length=256, verbose_name='Заголовок')
     text = models.TextField(verbose_name='Текст')
     pub_date = models.DateTimeField(
@@ -81,15 +100,112 @@ class Post(TimeStampedModel):
         related_name='posts'
     )
     image = models.ImageField('Фото', upload_to='post_images', blank=True)
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии фото'
+    )
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Виден читателям',
+        help_text='Публикация и её категория опубликованы, '
+                  'время публикации наступило.'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    excerpt = models.CharField(
+        max_length=EXCERPT_MAX_LENGTH,
+        blank=True,
+        editable=False,
+        verbose_name='Начало текста'
+    )
+    excerpt_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Начало текста в HTML'
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date'],
+                condition=models.Q(is_visible=True),
+                name='post_visible_feed_idx'
+            ),
+            models.Index(
+                fields=['category', '-pub_date'],
+                condition=models.Q(is_visible=True),
+                name='post_visible_category_idx'
+            ),
+            models.Index(
+                fields=['pub_date'],
+                condition=models.Q(is_visible=False, is_published=True),
+                name='post_scheduled_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_feed_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title[:30]
 
+    def get_absolute_url(self):
+        return post_url(self.pk)
+
+    @property
+    def card_image(self):
+        return get_image_variant(self, 'card')
+
+    @property
+    def detail_image(self):
+        return get_image_variant(self, 'detail')
+
+    @property
+    def image_placeholder(self):
+        return get_image_placeholder(self)
+
+    @property
+    def image_srcset(self):
+        return get_image_srcset(self)
+
+    @property
+    def image_sources(self):
+        return get_image_sources(self)
+
+    def save(self, *args, **kwargs):
+        self.is_visible = (
+            self.is_published
+            and self.category.is_published
+            and self.pub_date <= timezone.now()
+        )
+        self.refresh_excerpt()
+        if not self.image:
+            self.image_variants = {}
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields, 'is_visible', 'excerpt', 'excerpt_html',
+                'image_variants', 'updated_at'}
+        super().save(*args, **kwargs)
+
+    def refresh_excerpt(self):
+        """Precompute the feed card text, as linebreaks|truncatewords."""
+        self.excerpt = Truncator(
+            Truncator(self.text).words(self.EXCERPT_WORDS, truncate=' …')
+        ).chars(self.EXCERPT_MAX_LENGTH)
+        self.excerpt_html = Truncator(linebreaks_filter(self.text)).words(
+            self.EXCERPT_WORDS, truncate=' …')
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -116,6 +232,12 @@ class Comment(models.Model):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = [
+            models.Index(
+                fields=['post', 'created_at', 'id'],
+                name='comment_thread_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:50]
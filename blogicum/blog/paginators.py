@@ -0,0 +1,216 @@
+import base64
+import binascii
+import json
+import time
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .caching import single_flight
+
+FEED_COUNT_GENERATION_KEY = 'blog:feed-count-generation'
+
+
+def feed_count_key(feed):
+    # Generations are time.time_ns() values rather than a counter, so a
+    # generation key lost to eviction never brings old counts back.
+    generation = cache.get_or_set(
+        FEED_COUNT_GENERATION_KEY, time.time_ns, None)
+    return f'blog:feed-count:{generation}:{feed}'
+
+
+def invalidate_feed_counts(*feeds):
+    """Drop cached counts of the given feeds, or of every feed."""
+    if not feeds:
+        cache.set(FEED_COUNT_GENERATION_KEY, time.time_ns(), None)
+        return
+    cache.delete_many([feed_count_key(feed) for feed in feeds])
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that keeps the feed's COUNT(*) in the shared cache.
+
+    Counts are stored per feed name and dropped by the blog signals when
+    posts change; for very large tables the planner's row estimate can
+    stand in for an exact count.
+    """
+
+    def __init__(self, object_list, per_page, feed=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.feed = feed
+
+    @cached_property
+    def count(self):
+        if self.feed is None:
+            return super().count
+        return single_flight(
+            feed_count_key(self.feed), self._count,
+            timeout=settings.BLOG_FEED_COUNT_TIMEOUT,
+        )
+
+    def _count(self):
+        count = self.estimated_count()
+        if count is None:
+            count = super().count
+        return count
+
+    def estimated_count(self):
+        threshold = settings.BLOG_COUNT_ESTIMATE_THRESHOLD
+        connection = connections[self.object_list.db]
+        if threshold is None or connection.vendor != 'postgresql':
+            return None
+        sql, params = self.object_list.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        rows = int(plan[0]['Plan']['Plan Rows'])
+        return rows if rows >= threshold else None
+
+
+class KeysetPage(Sequence):
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<KeysetPage of %s items>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[0])
+
+
+class KeysetPaginator:
+    """Seek pagination over a unique ordering instead of OFFSET.
+
+    Pages are addressed by opaque ``after``/``before`` cursors built from
+    the ordering values of the last/first object on the page, so every
+    page costs one indexed range query regardless of its depth.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = self._unique_ordering(
+            ordering or object_list.query.order_by
+            or object_list.model._meta.ordering
+        )
+
+    @staticmethod
+    def _unique_ordering(ordering):
+        ordering = [field for field in ordering if isinstance(field, str)]
+        names = {field.lstrip('-') for field in ordering}
+        if not names & {'pk', 'id'}:
+            descending = bool(ordering) and ordering[0].startswith('-')
+            ordering.append('-pk' if descending else 'pk')
+        return tuple(ordering)
+
+    def _field(self, name):
+        opts = self.object_list.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def encode_cursor(self, obj):
+        values = [
+            self._field(field.lstrip('-')).value_to_string(obj)
+            for field in self.ordering
+        ]
+        raw = json.dumps(values).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            return None
+        try:
+            return [
+                self._field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            return None
+
+    def _seek_filter(self, values, reverse):
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            step = Q(**{
+                previous.lstrip('-'): value
+                for previous, value in zip(self.ordering[:i], values)
+            })
+            step &= Q(**{f'{name}__{lookup}': values[i]})
+            condition |= step
+        return condition
+
+    @staticmethod
+    def _reversed(ordering):
+        return [
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in ordering
+        ]
+
+    def get_page(self, after=None, before=None):
+        """Return the page following ``after`` or preceding ``before``.
+
+        Unreadable cursors fall back to the first page, mirroring how
+        ``Paginator.get_page`` tolerates bad page numbers.
+        """
+        queryset = self.object_list.order_by(*self.ordering)
+        before_values = self.decode_cursor(before) if before else None
+        after_values = self.decode_cursor(after) if after else None
+
+        if before_values is not None:
+            rows = list(
+                queryset.filter(self._seek_filter(before_values, True))
+                .order_by(*self._reversed(self.ordering))[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            return KeysetPage(
+                rows[:self.per_page][::-1], self,
+                has_next=True, has_previous=has_previous
+            )
+
+        if after_values is not None:
+            queryset = queryset.filter(self._seek_filter(after_values, False))
+        rows = list(queryset[:self.per_page + 1])
+        return KeysetPage(
+            rows[:self.per_page], self,
+            has_next=len(rows) > self.per_page,
+            has_previous=after_values is not None
+        )
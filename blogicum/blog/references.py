@@ -0,0 +1,99 @@
+"""Process-local copies of the small Category and Location tables."""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Category, Location
+
+
+class ReferenceCache:
+    """Whole reference table kept in memory, looked up by pk or ``lookups``.
+
+    Saving or deleting a row bumps a version key in the shared cache (see
+    ``blog.signals``); other processes notice it within
+    BLOG_REFERENCE_CHECK_INTERVAL seconds and reload the table. This
+    needs a cache backend every process sees, which the blog.W001 check
+    asks for: with a process-local one, other workers would keep their
+    copy until restarted.
+    """
+
+    def __init__(self, model, *lookups):
+        self.model = model
+        self.lookups = lookups
+        self.version_key = f'blog:reference:{model._meta.label_lower}'
+        self._state = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        cache.set(self.version_key, time.time_ns(), None)
+        self.clear()
+
+    def clear(self):
+        self._state = None
+
+    def _shared_version(self):
+        cache.add(self.version_key, time.time_ns(), None)
+        return cache.get(self.version_key)
+
+    def _load(self, force=False):
+        state = self._state
+        now = time.monotonic()
+        interval = settings.BLOG_REFERENCE_CHECK_INTERVAL
+        if (state is not None and not force
+                and now - self._checked_at < interval):
+            return state
+        with self._lock:
+            version = self._shared_version()
+            self._checked_at = now
+            if self._state is None or self._state[0] != version:
+                objects = list(self.model.objects.all())
+                self._state = (
+                    version,
+                    {obj.pk: obj for obj in objects},
+                    {
+                        field: {getattr(obj, field): obj for obj in objects}
+                        for field in self.lookups
+                    },
+                )
+            return self._state
+
+    @property
+    def version(self):
+        """Changes whenever the table does; usable as part of cache keys."""
+        return self._load()[0]
+
+    def _find(self, index):
+        found = index(self._load())
+        if found is None:
+            found = index(self._load(force=True))
+        return found
+
+    def get(self, pk):
+        return self._find(lambda state: state[1].get(pk))
+
+    def get_by(self, field, value):
+        return self._find(lambda state: state[2][field].get(value))
+
+
+categories = ReferenceCache(Category, 'slug')
+locations = ReferenceCache(Location)
+
+
+def reference_cache(model):
+    return {Category: categories, Location: locations}.get(model)
+
+
+def attach_references(posts):
+    """Point the posts' category and location at the cached rows."""
+    for post in posts:
+        category = categories.get(post.category_id)
+        if category is not None:
+            post.category = category
+        if post.location_id is not None:
+            location = locations.get(post.location_id)
+            if location is not None:
+                post.location = location
+    return posts
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import Post
+from .signals import posts_published
+
+
+def scheduled_posts():
+    return Post.objects.filter(
+        is_visible=False, is_published=True, category__is_published=True)
+
+
+def next_scheduled_publication(now=None):
+    """Moment the next deferred post goes live, or None.
+
+    Pages built from the public feeds stay valid until then, so caches
+    may use it as their expiry.
+    """
+    return scheduled_posts().filter(
+        pub_date__gt=now or timezone.now()
+    ).aggregate(next_at=Min('pub_date'))['next_at']
+
+
+def publish_due_posts(now=None):
+    """Make every post whose pub_date has passed visible to readers."""
+    with transaction.atomic():
+        post_ids = list(
+            scheduled_posts().filter(pub_date__lte=now or timezone.now())
+            .select_for_update().values_list('pk', flat=True)
+        )
+        if post_ids:
+            Post.objects.filter(pk__in=post_ids).update(
+                is_visible=True, updated_at=now or timezone.now())
+    if post_ids:
+        posts_published.send(sender=Post, post_ids=post_ids)
+    return post_ids
@@ -0,0 +1,181 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .caching import invalidate_tags
+from .models import Category, Comment, Location, Post, User
+from .paginators import invalidate_feed_counts
+from .references import categories, locations
+
+VISIBILITY_BATCH_SIZE = 5000
+
+# Sent with ``post_ids`` when deferred posts become visible to readers.
+posts_published = Signal()
+
+
+def set_category_visibility(category_id, visible):
+    """Propagate a category (un)publishing to its posts in bounded batches."""
+    posts = Post.objects.filter(
+        category_id=category_id, is_visible=not visible)
+    if visible:
+        posts = posts.filter(is_published=True, pub_date__lte=timezone.now())
+    while True:
+        batch = list(
+            posts.values_list('pk', flat=True)[:VISIBILITY_BATCH_SIZE])
+        if not batch:
+            break
+        Post.objects.filter(pk__in=batch).update(
+            is_visible=visible, updated_at=timezone.now())
+    invalidate_feed_counts()
+    author_ids = (
+        Post.objects.filter(category_id=category_id)
+        .order_by().values_list('author_id', flat=True).distinct()
+    )
+    invalidate_tags(
+        'feed:index', f'feed:category:{category_id}',
+        *(f'feed:author:{author_id}:public' for author_id in author_ids)
+    )
+
+
+def change_comment_count(post_id, delta):
+    """Shift the post's comment counter; its thread changed, so touch it."""
+    Post.objects.filter(pk=post_id).update(
+        comment_count=Greatest(F('comment_count') + delta, 0),
+        updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, raw, **kwargs):
+    instance._previous_post_id = None
+    if instance.pk and not raw:
+        instance._previous_post_id = (
+            Comment.objects.filter(pk=instance.pk)
+            .values_list('post_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        change_comment_count(instance.post_id, 1)
+        return
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if previous_post_id and previous_post_id != instance.post_id:
+        change_comment_count(previous_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+    else:
+        Post.objects.filter(pk=instance.post_id).update(
+            updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    tags = {f'post:{instance.post_id}'}
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if previous_post_id:
+        tags.add(f'post:{previous_post_id}')
+    invalidate_tags(*tags)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_published(sender, instance, raw, **kwargs):
+    instance._was_published = None
+    if instance.pk and not raw:
+        instance._was_published = (
+            Category.objects.filter(pk=instance.pk)
+            .values_list('is_published', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Category)
+def propagate_category_published(sender, instance, created, raw, **kwargs):
+    was_published = getattr(instance, '_was_published', None)
+    if raw or created or was_published in (None, instance.is_published):
+        return
+    set_category_visibility(instance.pk, instance.is_published)
+
+
+def post_feeds(post):
+    return (
+        'index',
+        f'category:{post.category_id}',
+        f'author:{post.author_id}:all',
+        f'author:{post.author_id}:public',
+    )
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_category(sender, instance, raw, **kwargs):
+    instance._previous_category_id = None
+    if instance.pk and not raw:
+        instance._previous_category_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('category_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_caches(sender, instance, **kwargs):
+    feeds = post_feeds(instance)
+    previous_category_id = getattr(instance, '_previous_category_id', None)
+    if previous_category_id not in (None, instance.category_id):
+        feeds += (f'category:{previous_category_id}',)
+    invalidate_feed_counts(*feeds)
+    invalidate_tags(f'post:{instance.pk}', *(f'feed:{f}' for f in feeds))
+
+
+@receiver(posts_published)
+def invalidate_published_caches(sender, post_ids, **kwargs):
+    invalidate_feed_counts()
+    feeds = set()
+    for post in Post.objects.filter(pk__in=post_ids).only(
+            'category_id', 'author_id'):
+        feeds.update(post_feeds(post))
+    invalidate_tags(
+        *(f'post:{post_id}' for post_id in post_ids),
+        *(f'feed:{feed}' for feed in feeds)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+def invalidate_reference_caches(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    invalidate_tags(f'{sender._meta.model_name}:{instance.pk}')
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+def invalidate_deleted_reference_caches(sender, instance, **kwargs):
+    invalidate_tags(f'{sender._meta.model_name}:{instance.pk}')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    categories.invalidate()
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_locations(sender, **kwargs):
+    locations.invalidate()
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_caches(sender, instance, raw, update_fields, **kwargs):
+    if raw or update_fields == frozenset({'last_login'}):
+        return
+    invalidate_tags(f'author:{instance.pk}')
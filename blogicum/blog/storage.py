@@ -0,0 +1,34 @@
+"""Media storage that shares identical files."""
+import hashlib
+import os
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that names files after a hash of their content.
+
+    Saving content that is already stored writes nothing and returns the
+    existing name, so identical uploads and re-saved images share one
+    file. The directory and extension of the requested name are kept.
+    Nothing is deleted when a post lets go of a file; the
+    collect_unused_images command sweeps files nobody refers to.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(directory, digest.hexdigest() + extension)
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            # Reusing a file makes it recent again, so a sweep running
+            # before the new reference is committed leaves it alone.
+            os.utime(self.path(name))
+            return name
+        return super()._save(name, content)
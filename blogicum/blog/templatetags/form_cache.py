@@ -0,0 +1,50 @@
+import hashlib
+
+from django import forms, template
+from django.utils import translation
+from django_bootstrap5.templatetags.django_bootstrap5 import bootstrap_form
+
+from blog.references import reference_cache
+
+register = template.Library()
+
+# (form class, language, prefix, options) -> (variant, markup)
+RENDERED_FORMS = {}
+
+
+def form_variant(form):
+    """What, besides the class, an unbound form's markup depends on.
+
+    None when it cannot be told: bound forms, forms of saved instances
+    and forms offering choices from tables other than the cached
+    reference ones.
+    """
+    instance = getattr(form, 'instance', None)
+    if form.is_bound or instance is not None and instance.pk is not None:
+        return None
+    versions = []
+    for field in form.fields.values():
+        if isinstance(field, forms.ModelChoiceField):
+            reference = reference_cache(field.queryset.model)
+            if reference is None:
+                return None
+            versions.append(reference.version)
+    initial = hashlib.md5(repr(sorted(form.initial.items())).encode())
+    return (*versions, initial.hexdigest())
+
+
+@register.simple_tag
+def cached_bootstrap_form(form, **kwargs):
+    """``bootstrap_form`` that renders an empty form once per process."""
+    variant = form_variant(form)
+    if variant is None:
+        return bootstrap_form(form, **kwargs)
+    key = (
+        type(form), translation.get_language(), form.prefix,
+        tuple(sorted(kwargs.items()))
+    )
+    cached = RENDERED_FORMS.get(key)
+    if cached is None or cached[0] != variant:
+        cached = RENDERED_FORMS[key] = (
+            variant, bootstrap_form(form, **kwargs))
+    return cached[1]
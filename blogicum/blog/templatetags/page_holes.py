@@ -0,0 +1,47 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name):
+    """Include a template that is rendered anew for every reader."""
+    return mark_safe(holes.include_hole(context.request, template_name))
+
+
+@register.simple_tag(takes_context=True)
+def csrf_hole(context):
+    return mark_safe(holes.csrf_hole(context.request))
+
+
+class OwnerOnlyNode(template.Node):
+    def __init__(self, owner_id, nodelist):
+        self.owner_id = owner_id
+        self.nodelist = nodelist
+
+    def render(self, context):
+        return mark_safe(holes.owner_section(
+            context.request,
+            self.owner_id.resolve(context),
+            lambda: self.nodelist.render(context)
+        ))
+
+
+@register.tag
+def owner_only(parser, token):
+    """Show the enclosed block only to the user with the given id.
+
+    Usage::
+
+        {% owner_only post.author_id %}...{% endowner_only %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает ровно один аргумент: id владельца.')
+    nodelist = parser.parse(('endowner_only',))
+    parser.delete_first_token()
+    return OwnerOnlyNode(parser.compile_filter(bits[1]), nodelist)
@@ -0,0 +1,18 @@
+from django import template
+from django.conf import settings
+
+from blog.caching import post_card_version as card_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card_timeout():
+    """BLOG_POST_CARD_TIMEOUT, for the ``cache`` tag around a post card."""
+    return settings.BLOG_POST_CARD_TIMEOUT
+
+
+@register.simple_tag
+def post_card_version(post):
+    """Stamp to key the cached card on; see blog.caching.post_card_version."""
+    return card_version(post)
@@ -1,71 +1,291 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Count
+from django.http import Http404
 from django.shortcuts import get_object_or_404, render, redirect
-from django.utils import timezone
+from django.utils.cache import quote_etag
+from django.utils.http import http_date
+from django.views.decorators.http import condition
 
 
-from .models import Category, Comment, Post, User
+from .caching import (
+    cache_shared_page, post_tags, posts_tags, private_response,
+    require_revalidation, tag_response, user_etag
+)
+from .models import Comment, Post, User
 from .forms import CommentForm, EditProfileForm, PostForm
+from .paginators import CachedCountPaginator, KeysetPaginator
+from .references import attach_references, categories
+
+# Columns includes/post_card.html reads; list views fetch nothing else.
+# Categories and locations come from blog.references, not from joins.
+POST_CARD_FIELDS = (
+    'title', 'pub_date', 'is_published', 'image', 'image_variants',
+    'excerpt_html', 'comment_count', 'updated_at',
+    'author__username', 'category', 'location',
+)
+
+# Columns behind post_stamps(): conditional GETs compare these instead
+# of rendering the page.
+POST_STAMP_FIELDS = ('updated_at', 'author__username', 'category', 'location')
 
 
 def get_posts_queryset(posts=Post.objects, filter_published=True,
-                       select_related_fields=True, annotate_comments=True):
+                       select_related_fields=True, card_fields=False):
 
     if filter_published:
-        posts = posts.filter(
-            is_published=True,
-            pub_date__lte=timezone.now(),
-            category__is_published=True
-        )
+        posts = posts.filter(is_visible=True)
 
     if select_related_fields:
-        posts = posts.select_related('author', 'location', 'category')
-
-    if annotate_comments:
-        posts = posts.annotate(
-            comment_count=Count('comments')).order_by(*Post._meta.ordering)
+        posts = posts.select_related('author')
+        if card_fields:
+            posts = posts.only(*POST_CARD_FIELDS)
     return posts
 
 
-def get_paginated_response(queryset, request, per_page=10):
-    return Paginator(queryset, per_page).get_page(request.GET.get('page'))
+def get_page_window(number, last_number, on_each_side=3):
+    """Page numbers for the pager: first, last and those around the current.
+
+    None stands for each skipped stretch of pages.
+    """
+    window = []
+    around = range(number - on_each_side, number + on_each_side + 1)
+    for i in (1, *around, last_number):
+        if not 1 <= i <= last_number or window and i <= window[-1]:
+            continue
+        if window and i > window[-1] + 1:
+            window.append(None)
+        window.append(i)
+    return window
+
+
+def get_paginated_response(queryset, request, per_page=10, keyset=None,
+                           feed=None):
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if keyset is None:
+        keyset = settings.BLOG_KEYSET_PAGINATION
+    if keyset or after or before:
+        return KeysetPaginator(queryset, per_page).get_page(
+            after=after, before=before)
+
+    number = request.GET.get('page')
+    page_limit = None
+    if not request.user.is_authenticated:
+        page_limit = settings.BLOG_ANONYMOUS_MAX_PAGE
+        if number and number.isdigit() and int(number) > page_limit:
+            raise Http404
+
+    paginator = CachedCountPaginator(queryset, per_page, feed=feed)
+    page = paginator.get_page(number)
+    page.last_page_number = min(
+        paginator.num_pages, page_limit or paginator.num_pages)
+    page.page_window = get_page_window(page.number, page.last_page_number)
+    return page
+
+
+def is_conditional(request):
+    """Whether the client asks to revalidate a copy it already holds."""
+    # META rather than headers: cache_shared_page hides these from views
+    # while it renders a page to store.
+    return ('HTTP_IF_NONE_MATCH' in request.META
+            or 'HTTP_IF_MODIFIED_SINCE' in request.META)
+
+
+def make_etag(*parts):
+    """Validator of a page body shared by all its readers."""
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def set_validators(request, response, etag, last_modified=None):
+    response.shared_etag = etag
+    response['ETag'] = quote_etag(user_etag(request, etag))
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return require_revalidation(request, response)
+
+
+def post_stamps(post):
+    return (
+        post.pk, post.author.username, post.updated_at,
+        post.category.updated_at, post.location and post.location.updated_at
+    )
+
+
+def page_etag(page, *parts):
+    """Validator of a feed page from its posts' stamps, not their bodies."""
+    return make_etag(
+        *parts, [post_stamps(post) for post in page],
+        page.has_previous(), page.has_next(),
+        getattr(page, 'page_window', None))
 
 
+def feed_etag(request, posts, feed, *parts):
+    """Validator for ``condition``; plain GETs get it from the page itself."""
+    if not is_conditional(request):
+        return None
+    page = get_paginated_response(
+        posts.only(*POST_STAMP_FIELDS), request, feed=feed)
+    attach_references(page)
+    return user_etag(request, page_etag(page, *parts))
+
+
+def index_etag(request):
+    return feed_etag(request, get_posts_queryset(), 'index')
+
+
+@cache_shared_page
+@condition(etag_func=index_etag)
 def index(request):
-    return render(request, 'blog/index.html', {
-        'page_obj': get_paginated_response(
-            get_posts_queryset(),
-            request)
-    })
+    page_obj = get_paginated_response(
+        get_posts_queryset(card_fields=True),
+        request,
+        feed='index')
+    attach_references(page_obj)
+    response = render(request, 'blog/index.html', {'page_obj': page_obj})
+    set_validators(request, response, page_etag(page_obj))
+    return tag_response(response, 'feed:index', *posts_tags(page_obj))
 
 
-def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    if post.author != request.user:
-        post = get_object_or_404(get_posts_queryset(
-            annotate_comments=False,
-            select_related_fields=False), pk=post_id)
+def get_post_for_reader(request, post_id, posts=Post.objects):
+    post = get_object_or_404(posts, pk=post_id)
+    if post.author_id != request.user.id and not post.is_visible:
+        raise Http404
+    return post
+
+
+def get_comments_page(post, request):
+    return KeysetPaginator(
+        post.comments.select_related('author'),
+        settings.BLOG_COMMENTS_PER_PAGE
+    ).get_page(after=request.GET.get('after'))
+
+
+def comments_tags(post, comments):
+    return {f'post:{post.pk}'} | {
+        f'author:{comment.author_id}' for comment in comments}
+
+
+def get_stamped_post(request, post_id):
+    post = get_post_for_reader(
+        request, post_id,
+        Post.objects.select_related('author').only(
+            'is_visible', *POST_STAMP_FIELDS)
+    )
+    attach_references([post])
+    return post
+
+
+def post_validators(post):
+    """Validators of a post page: its ETag and Last-Modified.
+
+    Comment changes touch ``Post.updated_at``, so it covers the thread.
+    """
+    stamps = post_stamps(post)
+    return (
+        make_etag(post.is_visible, *stamps),
+        max(stamp for stamp in stamps[2:] if stamp)
+    )
+
 
-    return render(request, 'blog/detail.html', {
+def get_post_validators(request, post_id):
+    if not is_conditional(request):
+        return None, None
+    if not hasattr(request, '_post_validators'):
+        try:
+            post = get_stamped_post(request, post_id)
+        except Http404:
+            request._post_validators = None, None
+        else:
+            request._post_validators = post_validators(post)
+    return request._post_validators
+
+
+def post_etag(request, post_id):
+    etag = get_post_validators(request, post_id)[0]
+    return etag and user_etag(request, etag)
+
+
+def post_last_modified(request, post_id):
+    return get_post_validators(request, post_id)[1]
+
+
+@cache_shared_page
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+def post_detail(request, post_id):
+    post = get_post_for_reader(
+        request, post_id,
+        Post.objects.select_related('author')
+    )
+    attach_references([post])
+    comments = get_comments_page(post, request)
+    response = render(request, 'blog/detail.html', {
         'post': post,
         'form': CommentForm(),
-        'comments': post.comments.all()
+        'comments': comments
+    })
+    set_validators(request, response, *post_validators(post))
+    if not post.is_visible:
+        private_response(response)
+    return tag_response(
+        response, *post_tags(post), *comments_tags(post, comments))
+
+
+@cache_shared_page
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+def post_comments(request, post_id):
+    post = get_stamped_post(request, post_id)
+    comments = get_comments_page(post, request)
+    response = render(request, 'includes/comments.html', {
+        'post': post,
+        'comments': comments
     })
+    set_validators(request, response, *post_validators(post))
+    if not post.is_visible:
+        private_response(response)
+    return tag_response(response, *comments_tags(post, comments))
+
+
+def get_published_category(category_slug):
+    category = categories.get_by('slug', category_slug)
+    if category is None or not category.is_published:
+        raise Http404
+    return category
+
 
+def category_posts_etag(request, category_slug):
+    try:
+        category = get_published_category(category_slug)
+    except Http404:
+        return None
+    return feed_etag(
+        request,
+        get_posts_queryset(posts=category.posts),
+        f'category:{category.pk}',
+        category.pk, category.updated_at)
 
+
+@cache_shared_page
+@condition(etag_func=category_posts_etag)
 def category_posts(request, category_slug):
-    category = get_object_or_404(
-        Category,
-        slug=category_slug,
-        is_published=True
-    )
-    return render(request, 'blog/category.html', {
+    category = get_published_category(category_slug)
+    feed = f'category:{category.pk}'
+    page_obj = get_paginated_response(
+        get_posts_queryset(posts=category.posts, card_fields=True),
+        request,
+        feed=feed)
+    attach_references(page_obj)
+    response = render(request, 'blog/category.html', {
         'category': category,
-        'page_obj': get_paginated_response(
-            get_posts_queryset(posts=category.posts),
-            request)
+        'page_obj': page_obj
     })
+    set_validators(
+        request, response,
+        page_etag(page_obj, category.pk, category.updated_at))
+    return tag_response(
+        response, f'feed:{feed}', f'category:{category.pk}',
+        *posts_tags(page_obj))
 
 
 @login_required
@@ -149,17 +369,55 @@ def delete_comment(request, post_id, comment_id):
                                                  'post': comment.post})
 
 
+def author_feed(author_id, is_author):
+    return f'author:{author_id}:{"all" if is_author else "public"}'
+
+
+def profile_stamps(author):
+    return author.pk, author.get_full_name(), author.is_staff
+
+
+def is_own_profile(request, username):
+    return request.user.get_username() == username
+
+
+def user_profile_etag(request, username):
+    author = User.objects.filter(username=username).only(
+        'first_name', 'last_name', 'is_staff').first()
+    if author is None:
+        return None
+    is_author = request.user == author
+    posts = get_posts_queryset(
+        posts=Post.objects.filter(author=author),
+        filter_published=not is_author
+    )
+    return feed_etag(
+        request, posts, author_feed(author.pk, is_author),
+        *profile_stamps(author))
+
+
+@cache_shared_page(bypass=is_own_profile)
+@condition(etag_func=user_profile_etag)
 def user_profile(request, username):
     author = get_object_or_404(User, username=username)
+    is_author = request.user == author
     posts = get_posts_queryset(
         posts=author.posts,
-        filter_published=request.user != author
+        filter_published=not is_author,
+        card_fields=True
     )
-
-    return render(request, 'blog/profile.html', {
+    feed = author_feed(author.pk, is_author)
+    page_obj = get_paginated_response(posts, request, feed=feed)
+    attach_references(page_obj)
+    response = render(request, 'blog/profile.html', {
         'profile': author,
-        'page_obj': get_paginated_response(posts, request)
+        'page_obj': page_obj
     })
+    set_validators(
+        request, response, page_etag(page_obj, *profile_stamps(author)))
+    return tag_response(
+        response, f'feed:{feed}', f'author:{author.pk}',
+        *posts_tags(page_obj))
 
 
 @login_required
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 
+from django.utils.module_loading import import_string
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -89,6 +91,25 @@ DATABASES = {
 }
 
 
+# Every worker process, the admin and the publish_scheduled worker must
+# see the same cache, or invalidations made in one never reach the
+# others. The file cache is shared by the processes of one host; use
+# Redis or Memcached when running on several, or once the blog outgrows
+# it: the file cache lists its whole directory on every write.
+# MAX_ENTRIES leaves room for a feed card and a few cached pages per
+# post; once it is reached, one entry in CULL_FREQUENCY is dropped.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 500_000,
+            'CULL_FREQUENCY': 10,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -144,4 +165,107 @@ LOGIN_URL = 'login'
 
 LOGIN_REDIRECT_URL = 'blog:index'
 
+# blog.links is imported on first use: settings load before the apps do.
+ABSOLUTE_URL_OVERRIDES = {
+    'auth.user': lambda user: import_string('blog.links.profile_url')(
+        user.get_username()),
+}
+
 MEDIA_ROOT = BASE_DIR / 'media'
+
+MEDIA_URL = '/media/'
+
+# collect_unused_images only deletes post images that have been unused
+# and untouched for this many seconds. Run it periodically, e.g. from
+# cron next to publish_scheduled.
+BLOG_UNUSED_IMAGE_GRACE = 24 * 60 * 60
+
+# Browsers may keep media files for this many seconds; files under
+# content-hash names never change and are kept for a year.
+BLOG_MEDIA_MAX_AGE = 3600
+
+# How blog.media.serve_media sends files: None streams them from Python,
+# 'x-accel-redirect' hands them to nginx under BLOG_MEDIA_ACCEL_PREFIX
+# (an internal location aliased to MEDIA_ROOT), 'x-sendfile' to Apache
+# or lighttpd by their full path.
+BLOG_MEDIA_OFFLOAD = None
+BLOG_MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Uploads are named by content hash, so identical files are stored once.
+STORAGES = {
+    'default': {
+        'BACKEND': 'blog.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Feeds switch from ?page=N to opaque ?after=/?before= cursors keyed on
+# (pub_date, id), so deep pages cost the same as the first one.
+BLOG_KEYSET_PAGINATION = False
+
+# Comments on a post page are shown in slices of this size, the rest are
+# fetched by the "load more" link.
+BLOG_COMMENTS_PER_PAGE = 50
+
+# Deepest ?page=N an anonymous visitor may open in a feed; deep OFFSET
+# pages are what crawlers hammer.
+BLOG_ANONYMOUS_MAX_PAGE = 100
+
+# Rendered feed cards are kept for this many seconds; changes to a post,
+# its comments, author, category or location drop them earlier.
+BLOG_POST_CARD_TIMEOUT = 3600
+
+# Feed post counts are cached for this many seconds; post changes drop
+# them earlier.
+BLOG_FEED_COUNT_TIMEOUT = 300
+
+# On PostgreSQL, feeds whose planner row estimate reaches this size use
+# the estimate instead of an exact COUNT(*). None always counts exactly.
+BLOG_COUNT_ESTIMATE_THRESHOLD = None
+
+# Pages served to logged-out readers from the shared cache are kept for
+# this many seconds unless a change to their content expires them first.
+BLOG_PAGE_CACHE_TIMEOUT = 600
+
+# After expiring, a page may still be served for this many seconds while
+# a single request rebuilds it.
+BLOG_PAGE_CACHE_STALE_TIMEOUT = 60
+
+# Serve logged-in readers from the same cached page bodies as well, with
+# their header, CSRF token and own edit links filled in per request.
+# Such responses are not rendered per request, so they carry no template
+# context.
+BLOG_SHARE_PAGES_WITH_USERS = False
+
+# How long one request may hold a cache rebuild before others stop
+# waiting for it and compute the value themselves.
+BLOG_CACHE_LOCK_TIMEOUT = 10
+
+# How often each process checks whether its in-memory copy of categories
+# and locations is still current, in seconds.
+BLOG_REFERENCE_CHECK_INTERVAL = 5
+
+# Widths, in pixels, of the resized copies made of every post image:
+# feed cards, the post page and 2x screens.
+BLOG_IMAGE_VARIANTS = {'card': 640, 'detail': 960, 'retina': 1280}
+
+BLOG_IMAGE_QUALITY = 85
+
+# Formats each variant is also saved in and offered to browsers that
+# support them, best first. Those the installed Pillow cannot write are
+# skipped. Uploads are saved without them; run build_image_variants
+# periodically, e.g. from cron, to add them.
+BLOG_IMAGE_FORMATS = ['avif', 'webp']
+
+# Uploads larger than this are streamed to a temporary file in chunks
+# instead of being held in memory.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# Limits checked before a post image is decoded; accepted images are
+# re-encoded with at most BLOG_IMAGE_MAX_SIDE pixels on the longer side.
+# The web server should cap request bodies at a similar size.
+BLOG_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+BLOG_IMAGE_MAX_PIXELS = 50_000_000
+BLOG_IMAGE_MAX_SIDE = 2560
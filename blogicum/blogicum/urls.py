@@ -2,9 +2,10 @@ from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path, reverse_lazy
 from django.contrib.auth.forms import UserCreationForm
-from django.conf.urls.static import static
 from django.views.generic.edit import CreateView
 
+from blog.media import serve_media
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -20,7 +21,12 @@ urlpatterns = [
         ),
         name='registration',
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:path>',
+        serve_media,
+        name='media',
+    ),
+]
 
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.error_500'
@@ -0,0 +1,38 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from PIL import Image
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def upload(size, name="photo.jpg", color="teal", mode="RGB",
+           image_format="JPEG", **options):
+    buffer = BytesIO()
+    Image.new(mode, size, color).save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def post_data(category, image):
+    return {
+        "title": "С картинкой",
+        "text": "Текст",
+        "pub_date": timezone.localtime(
+            timezone.now() - timezone.timedelta(hours=1)).strftime(
+            "%Y-%m-%dT%H:%M"),
+        "category": category.pk,
+        "is_published": True,
+        "image": image,
+    }
+
+
+def create_post(client, category, image):
+    response = client.post("/posts/create/", data=post_data(category, image))
+    assert response.status_code == 302
+    return category.posts.latest("pk")
@@ -0,0 +1,145 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from blog.caching import (
+    FILE_CACHE, acquire_lock, cache_shared_page, invalidate_tags,
+    lock_path, release_lock, single_flight, tag_response
+)
+
+N_THREADS = 8
+N_PROCESSES = 8
+
+
+def run_concurrently(func):
+    barrier = threading.Barrier(N_THREADS)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(func())
+
+    threads = [threading.Thread(target=worker) for _ in range(N_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.fixture
+def slow_view():
+    calls = []
+
+    @cache_shared_page(timeout=60, stale_timeout=60)
+    def view(request):
+        calls.append(1)
+        time.sleep(0.2)
+        return tag_response(
+            HttpResponse(f'render {len(calls)}'), 'feed:stampede')
+
+    view.calls = calls
+    return view
+
+
+def anonymous_get():
+    request = RequestFactory().get('/stampede/')
+    request.user = AnonymousUser()
+    return request
+
+
+def test_cold_cache_renders_once(slow_view):
+    responses = run_concurrently(lambda: slow_view(anonymous_get()))
+    assert len(slow_view.calls) == 1, (
+        'Убедитесь, что при одновременных запросах страница без кэша'
+        ' строится только одним из них.'
+    )
+    assert {response.content for response in responses} == {b'render 1'}
+
+
+def test_invalidated_page_served_stale_during_rebuild(slow_view):
+    slow_view(anonymous_get())
+    invalidate_tags('feed:stampede')
+
+    responses = run_concurrently(lambda: slow_view(anonymous_get()))
+    assert len(slow_view.calls) == 2, (
+        'Убедитесь, что устаревшую страницу перестраивает только один'
+        ' запрос.'
+    )
+    contents = [response.content for response in responses]
+    assert contents.count(b'render 2') == 1
+    assert contents.count(b'render 1') == N_THREADS - 1, (
+        'Убедитесь, что пока страница перестраивается, остальные читатели'
+        ' получают её предыдущую версию.'
+    )
+    assert slow_view(anonymous_get()).content == b'render 2'
+
+
+def test_uncacheable_rebuild_drops_stale_copy():
+    single_flight('stampede:gone', lambda: 'published', timeout=0,
+                  stale_timeout=60)
+    assert cache.get('stampede:gone')
+
+    assert single_flight('stampede:gone', lambda: None, timeout=0,
+                         stale_timeout=60) is None
+    assert cache.get('stampede:gone') is None, (
+        'Убедитесь, что если значение больше нельзя кешировать (например,'
+        ' публикацию сняли), его устаревшая копия удаляется из кеша.'
+    )
+    assert single_flight('stampede:gone', lambda: None, timeout=0,
+                         stale_timeout=60) is None
+
+
+@pytest.fixture
+def file_cache(settings, tmp_path):
+    settings.CACHES = {"default": {
+        "BACKEND": FILE_CACHE, "LOCATION": tmp_path}}
+
+
+def test_file_cache_lock_is_exclusive(file_cache):
+    assert acquire_lock("stampede:lock", 60)
+    assert not acquire_lock("stampede:lock", 60)
+    release_lock("stampede:lock")
+    assert acquire_lock("stampede:lock", 60)
+
+    stale = time.time() - 120
+    os.utime(lock_path("stampede:lock"), (stale, stale))
+    assert acquire_lock("stampede:lock", 60), (
+        "Убедитесь, что блокировка упавшего процесса истекает."
+    )
+
+
+def take_lock(barrier, taken):
+    barrier.wait()
+    if acquire_lock("stampede:race", 60):
+        taken.put(os.getpid())
+
+
+def test_file_cache_lock_taken_by_one_process(file_cache):
+    context = multiprocessing.get_context("fork")
+    for _ in range(10):
+        barrier = context.Barrier(N_PROCESSES)
+        taken = context.Queue()
+        processes = [
+            context.Process(target=take_lock, args=(barrier, taken))
+            for _ in range(N_PROCESSES)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        holders = []
+        while not taken.empty():
+            holders.append(taken.get())
+        assert len(holders) == 1, (
+            "Убедитесь, что с FileBasedCache блокировку перестройки берёт"
+            " только один процесс."
+        )
+        release_lock("stampede:race")
@@ -0,0 +1,65 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_views(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    for i in range(3):
+        user_client.post(
+            f"/posts/{post.id}/comment/", data={"text": f"Комментарий {i}"})
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что добавление комментария увеличивает счётчик"
+        " комментариев публикации."
+    )
+
+    comment = post.comments.first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что удаление комментария уменьшает счётчик"
+        " комментариев публикации."
+    )
+
+
+def test_comment_count_follows_cascades(
+        mixer, another_user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post, author=another_user)
+    mixer.blend("blog.Comment", post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3
+
+    another_user.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1
+
+
+def test_feed_query_has_no_group_by(
+        client, mixer, post_with_published_location):
+    mixer.cycle(2).blend("blog.Comment", post=post_with_published_location)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/")
+    assert "Комментарии (2)" in response.content.decode()
+    assert not any("GROUP BY" in q["sql"] for q in queries.captured_queries)
+
+
+def test_recount_comments_repairs_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(4).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=42)
+
+    call_command("recount_comments", "--dry-run", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.comment_count == 42
+
+    call_command("recount_comments", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.comment_count == 4
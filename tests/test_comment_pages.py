@@ -0,0 +1,50 @@
+import re
+
+import pytest
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+MORE_LINK = re.compile(r'href="(/posts/\d+/comments/\?after=[\w-]+)"')
+
+
+@pytest.fixture
+def long_thread(mixer, post_with_published_location):
+    return mixer.cycle(7).blend(
+        "blog.Comment",
+        post=post_with_published_location,
+        text=(f"Комментарий номер {i}" for i in range(7)),
+    )
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=3)
+def test_comments_are_loaded_in_slices(user_client, long_thread):
+    post = long_thread[0].post
+    content = user_client.get(f"/posts/{post.id}/").content.decode()
+    shown = [c.text for c in long_thread if c.text in content]
+    assert shown == [c.text for c in long_thread[:3]], (
+        "Убедитесь, что на странице публикации выводится только первая"
+        " порция комментариев."
+    )
+
+    seen = list(shown)
+    while MORE_LINK.search(content):
+        response = user_client.get(MORE_LINK.search(content).group(1))
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert "<form" not in content
+        seen.extend(c.text for c in long_thread if c.text in content)
+    assert seen == [c.text for c in long_thread], (
+        "Убедитесь, что ссылка «Показать ещё» по очереди отдаёт все"
+        " оставшиеся комментарии."
+    )
+
+
+def test_comment_fragment_respects_visibility(
+        user_client, another_user_client, long_thread):
+    post = long_thread[0].post
+    post.is_published = False
+    post.save()
+    url = f"/posts/{post.id}/comments/"
+    assert user_client.get(url).status_code == 200
+    assert another_user_client.get(url).status_code == 404
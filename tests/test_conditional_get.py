@@ -0,0 +1,96 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+
+pytestmark = [pytest.mark.django_db]
+
+
+def revalidate(client, url, etag):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    return response, queries
+
+
+@pytest.mark.parametrize("url", ["/", "/category/{slug}/", "/profile/{user}/"])
+def test_feed_answers_not_modified(
+        client, url, post_with_published_location):
+    post = post_with_published_location
+    url = url.format(slug=post.category.slug, user=post.author.username)
+    etag = client.get(url)["ETag"]
+    assert etag, "Убедитесь, что страницы ленты отдают заголовок ETag."
+
+    response, queries = revalidate(client, url, etag)
+    assert response.status_code == 304, (
+        "Убедитесь, что на повторный запрос с тем же ETag страница ленты"
+        " отвечает 304 Not Modified."
+    )
+    assert not any(
+        '"blog_post"."text"' in query["sql"]
+        for query in queries.captured_queries
+    ), "Убедитесь, что для проверки ETag не загружаются тексты публикаций."
+
+    post.title = "Новый заголовок"
+    post.save()
+    assert revalidate(client, url, etag)[0].status_code == 200
+
+
+def test_detail_validators_follow_comments(
+        client, mixer, post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    response = client.get(url)
+    etag, last_modified = response["ETag"], response["Last-Modified"]
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get(
+        url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+    comment = mixer.blend("blog.Comment", post=post)
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+        "Убедитесь, что новый комментарий меняет ETag страницы публикации."
+    )
+
+    etag = client.get(url)["ETag"]
+    comment.text = "Исправленный комментарий"
+    comment.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+        "Убедитесь, что правка комментария меняет ETag страницы публикации."
+    )
+    post.refresh_from_db()
+    assert client.get(
+        url, HTTP_IF_MODIFIED_SINCE=http_date(post.updated_at.timestamp())
+    ).status_code == 304
+
+
+def test_etag_depends_on_reader(
+        client, user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    assert client.get(url)["ETag"] != user_client.get(url)["ETag"], (
+        "Убедитесь, что ETag страницы зависит от пользователя, которому"
+        " она показана."
+    )
+
+
+def test_hidden_post_has_no_validators(
+        client, post_with_published_location):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    response = client.get(f"/posts/{post.id}/", HTTP_IF_NONE_MATCH="*")
+    assert response.status_code == 404
+
+
+def test_pages_with_validators_are_revalidated(
+        client, user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    for response in (client.get(url), client.get(url)):
+        assert response["Last-Modified"]
+        assert response["Cache-Control"] == "no-cache", (
+            "Убедитесь, что браузер не показывает страницу публикации из"
+            " своего кеша, не спросив сервер."
+        )
+    cache_control = user_client.get(url)["Cache-Control"]
+    assert set(cache_control.split(", ")) == {"no-cache", "private"}, (
+        "Убедитесь, что страница для вошедшего пользователя не"
+        " сохраняется в общих кешах."
+    )
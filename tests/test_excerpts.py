@@ -0,0 +1,37 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.template import Context, Template
+
+pytestmark = [pytest.mark.django_db]
+
+TEXT = (
+    "Первый абзац <b>с разметкой</b>\nи переносом строки.\n\n"
+    "Второй абзац, в котором заведомо больше десяти слов для обрезки."
+)
+
+
+def render_excerpt(text):
+    return Template("{{ text|linebreaks|truncatewords:10 }}").render(
+        Context({"text": text}))
+
+
+def test_excerpt_matches_template_filters(post_with_published_location):
+    post = post_with_published_location
+    post.text = TEXT
+    post.save()
+    post.refresh_from_db()
+    assert post.excerpt_html == render_excerpt(TEXT), (
+        "Убедитесь, что сохранённое начало текста совпадает с результатом"
+        " фильтров linebreaks|truncatewords:10."
+    )
+    assert post.excerpt.startswith("Первый абзац <b>с разметкой</b>")
+
+
+def test_backfill_excerpts(post_with_published_location):
+    post = post_with_published_location
+    type(post).objects.filter(pk=post.pk).update(excerpt="", excerpt_html="")
+    call_command("backfill_excerpts", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.excerpt_html == render_excerpt(post.text)
@@ -0,0 +1,55 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.paginators import FEED_COUNT_GENERATION_KEY, feed_count_key
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    return [q["sql"] for q in queries.captured_queries if "COUNT(" in q["sql"]]
+
+
+def test_feed_count_is_cached_and_invalidated(
+        client, many_posts_with_published_locations):
+    category = many_posts_with_published_locations[0].category
+    author = many_posts_with_published_locations[0].author
+    urls = ("/", f"/category/{category.slug}/", f"/profile/{author.username}/")
+    for url in urls:
+        assert count_queries(client, url), url
+        assert not count_queries(client, url), (
+            "Убедитесь, что число публикаций ленты берётся из кеша при"
+            " повторном запросе."
+        )
+
+    post = many_posts_with_published_locations[0]
+    post.title = "Новый заголовок"
+    post.save()
+    for url in urls:
+        assert count_queries(client, url), (
+            "Убедитесь, что изменение публикации сбрасывает кешированное"
+            " число публикаций её лент."
+        )
+
+
+def test_deleted_post_updates_num_pages(
+        client, many_posts_with_published_locations):
+    posts = many_posts_with_published_locations
+    assert client.get("/").context["page_obj"].paginator.num_pages == 2
+    for post in posts[N_PER_PAGE:]:
+        post.delete()
+    assert client.get("/").context["page_obj"].paginator.num_pages == 1
+
+
+def test_lost_generation_does_not_revive_old_counts():
+    key = feed_count_key("index")
+    cache.delete(FEED_COUNT_GENERATION_KEY)
+    assert feed_count_key("index") != key, (
+        "Убедитесь, что после вытеснения ключа поколения из кеша старые"
+        " числа публикаций не используются снова."
+    )
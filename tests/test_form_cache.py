@@ -0,0 +1,51 @@
+import pytest
+
+from blog.templatetags import form_cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def bootstrap_calls(monkeypatch):
+    calls = []
+    render = form_cache.bootstrap_form
+
+    def counting_render(form, **kwargs):
+        calls.append(type(form).__name__)
+        return render(form, **kwargs)
+
+    monkeypatch.setattr(form_cache, "RENDERED_FORMS", {})
+    monkeypatch.setattr(form_cache, "bootstrap_form", counting_render)
+    return calls
+
+
+def test_empty_comment_form_rendered_once(
+        bootstrap_calls, user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    first = user_client.get(url).content.decode()
+    second = user_client.get(url).content.decode()
+    assert bootstrap_calls == ["CommentForm"], (
+        "Убедитесь, что пустая форма комментария отрисовывается один раз"
+        " и затем берётся из кеша."
+    )
+    assert 'name="text"' in second
+    assert first.count('name="csrfmiddlewaretoken"') == 1
+
+
+def test_post_form_follows_new_categories(
+        bootstrap_calls, mixer, user_client):
+    user_client.get("/posts/create/")
+    user_client.get("/posts/create/")
+    assert bootstrap_calls == ["PostForm"]
+
+    category = mixer.blend("blog.Category", title="Совсем новая категория")
+    content = user_client.get("/posts/create/").content.decode()
+    assert str(category) in content, (
+        "Убедитесь, что новая категория сбрасывает кеш формы публикации."
+    )
+
+
+def test_bound_form_is_not_cached(bootstrap_calls, user_client):
+    user_client.post("/posts/create/", data={"title": ""})
+    user_client.post("/posts/create/", data={"title": ""})
+    assert bootstrap_calls == ["PostForm", "PostForm"]
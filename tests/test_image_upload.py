@@ -0,0 +1,83 @@
+import pytest
+from PIL import Image, ImageCms
+
+from fixtures.images import post_data, upload
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+ORIENTATION = 0x0112
+
+
+def oriented(orientation):
+    exif = Image.Exif()
+    exif[ORIENTATION] = orientation
+    return exif
+
+
+def test_upload_is_turned_upright_and_stripped(
+        user_client, published_category):
+    response = user_client.post(
+        "/posts/create/",
+        data=post_data(published_category, upload(
+            (300, 200), "camera.jpg", exif=oriented(6))))
+    assert response.status_code == 302
+    post = published_category.posts.latest("pk")
+    with post.image.open("rb") as file, Image.open(file) as image:
+        assert image.size == (200, 300), (
+            "Убедитесь, что фото публикации поворачивается согласно"
+            " ориентации из EXIF."
+        )
+        assert ORIENTATION not in image.getexif(), (
+            "Убедитесь, что из сохранённого фото удаляются данные EXIF."
+        )
+
+
+def test_upload_is_capped_at_max_side(
+        settings, user_client, published_category):
+    settings.BLOG_IMAGE_MAX_SIDE = 500
+    user_client.post(
+        "/posts/create/",
+        data=post_data(published_category, upload((1500, 600))))
+    post = published_category.posts.latest("pk")
+    assert post.image_variants["original"]["width"] == 500
+    assert post.image_variants["original"]["height"] == 200
+
+
+@pytest.mark.parametrize("setting, value", [
+    ("BLOG_IMAGE_MAX_PIXELS", 100 * 100),
+    ("BLOG_IMAGE_MAX_BYTES", 100),
+])
+def test_oversized_upload_is_rejected(
+        settings, user_client, published_category, setting, value):
+    setattr(settings, setting, value)
+    response = user_client.post(
+        "/posts/create/",
+        data=post_data(published_category, upload((400, 300))))
+    assert response.status_code == 200
+    assert response.context["form"].has_error("image"), (
+        "Убедитесь, что слишком большие изображения не принимаются."
+    )
+    assert not published_category.posts.exists()
+
+
+def srgb_profile():
+    return ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+
+@pytest.mark.parametrize("mode, keeps_profile", [
+    ("RGB", True),
+    ("CMYK", False),
+])
+def test_colour_profile_only_kept_for_same_mode(
+        user_client, published_category, mode, keeps_profile):
+    user_client.post("/posts/create/", data=post_data(
+        published_category,
+        upload((300, 200), "profiled.jpg", color=0, mode=mode,
+               icc_profile=srgb_profile())))
+    post = published_category.posts.latest("pk")
+    with post.image.open("rb") as file, Image.open(file) as image:
+        assert image.mode == "RGB"
+        assert bool(image.info.get("icc_profile")) == keeps_profile, (
+            "Убедитесь, что профиль цвета не переносится на фото,"
+            " переведённое в другую цветовую модель."
+        )
@@ -0,0 +1,165 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from PIL import Image
+
+from fixtures.images import create_post, upload
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+def test_upload_gets_resized_variants(
+        user_client, published_category, media_root):
+    post = create_post(user_client, published_category, upload((2000, 1000)))
+    variants = post.image_variants
+    original = variants["original"]
+    assert (original["name"], original["width"], original["height"]) == (
+        post.image.name, 2000, 1000)
+    assert [
+        (variants[v]["width"], variants[v]["height"])
+        for v in ("card", "detail", "retina")
+    ] == [(640, 320), (960, 480), (1280, 640)], (
+        "Убедитесь, что для фото публикации создаются уменьшенные копии"
+        " для карточки, страницы публикации и экранов высокой плотности."
+    )
+    for variant in ("card", "detail", "retina"):
+        assert (media_root / variants[variant]["name"]).is_file()
+
+    feed = user_client.get("/").content.decode()
+    assert f'src="{post.card_image.url}"' in feed
+    url = post.image.storage.url
+    assert post.image_srcset == (
+        f"{url(variants['card']['name'])} 640w, "
+        f"{url(variants['detail']['name'])} 960w, "
+        f"{url(variants['retina']['name'])} 1280w"
+    )
+    assert f'srcset="{post.image_srcset}" sizes="' in feed, (
+        "Убедитесь, что в srcset фото указана ширина каждой копии и что у"
+        " изображения есть атрибут sizes."
+    )
+    detail = user_client.get(f"/posts/{post.id}/").content.decode()
+    assert f'src="{post.detail_image.url}"' in detail
+
+
+def test_small_upload_is_not_upscaled(user_client, published_category):
+    post = create_post(
+        user_client, published_category,
+        upload((800, 600), "logo.png", mode="RGBA", image_format="PNG"))
+    variants = post.image_variants
+    assert variants["card"]["width"] == 640
+    assert variants["card"]["name"].endswith(".png")
+    assert variants["detail"] == variants["retina"] == variants["original"]
+    assert "placeholder" not in variants["original"], (
+        "Убедитесь, что превью фото хранится один раз, а не в описании"
+        " оригинала, общем для нескольких копий."
+    )
+    assert variants["placeholder"].startswith("data:image/png;base64,")
+    url = post.image.storage.url
+    assert post.image_srcset == (
+        f"{url(variants['card']['name'])} 640w, "
+        f"{url(variants['original']['name'])} 800w"
+    )
+
+
+def test_removing_image_drops_variants(user_client, published_category):
+    post = create_post(user_client, published_category, upload((1000, 800)))
+    post.image = None
+    post.save()
+    post.refresh_from_db()
+    assert post.image_variants == {}
+    assert post.card_image is None
+
+
+def test_build_image_variants_command(
+        user_client, published_category):
+    post = create_post(user_client, published_category, upload((1500, 900)))
+    type(post).objects.filter(pk=post.pk).update(image_variants={})
+    call_command("build_image_variants", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image_variants["card"]["width"] == 640
+
+
+def test_image_size_and_placeholder_rendered(
+        user_client, published_category):
+    post = create_post(user_client, published_category, upload((1500, 900)))
+    placeholder = post.image_variants["placeholder"]
+    assert placeholder.startswith("data:image/jpeg;base64,")
+    assert len(placeholder) < 1024
+
+    feed = user_client.get("/").content.decode()
+    assert 'width="640" height="384"' in feed, (
+        "Убедитесь, что у фото в карточке публикации указаны ширина и"
+        " высота."
+    )
+    assert f"url({placeholder})" in feed
+    detail = user_client.get(f"/posts/{post.id}/").content.decode()
+    assert 'width="960" height="576"' in detail
+
+
+def test_build_image_variants_backfills_placeholders(
+        user_client, published_category):
+    post = create_post(user_client, published_category, upload((1500, 900)))
+    variants = post.image_variants
+    placeholder = variants.pop("placeholder")
+    type(post).objects.filter(pk=post.pk).update(image_variants=variants)
+    call_command("build_image_variants", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image_variants["placeholder"] == placeholder, (
+        "Убедитесь, что команда build_image_variants дополняет фото"
+        " без превью."
+    )
+
+
+def test_variants_offered_in_modern_formats(
+        settings, user_client, published_category, media_root):
+    settings.BLOG_IMAGE_FORMATS = ["webp"]
+    post = create_post(user_client, published_category, upload((2000, 1000)))
+    assert post.image_variants["formats"] == []
+    assert "formats" not in post.image_variants["card"], (
+        "Убедитесь, что копии в форматах AVIF и WebP создаются не при"
+        " загрузке фото, а командой build_image_variants."
+    )
+    assert post.image_sources == []
+
+    call_command("build_image_variants", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image_variants["formats"] == ["webp"]
+    for variant in ("card", "detail", "retina"):
+        name = post.image_variants[variant]["formats"]["webp"]
+        with Image.open(media_root / name) as image:
+            assert image.format == "WEBP"
+    out = StringIO()
+    call_command("build_image_variants", stdout=out)
+    assert "Обновлено публикаций: 0" in out.getvalue()
+    variants = post.image_variants
+    del variants["formats"]
+    type(post).objects.filter(pk=post.pk).update(image_variants=variants)
+    call_command("build_image_variants", stdout=out)
+    assert "Обновлено публикаций: 1" in out.getvalue(), (
+        "Убедитесь, что команда build_image_variants дополняет фото,"
+        " сохранённые до появления списка форматов."
+    )
+
+    feed = user_client.get("/").content.decode()
+    [source] = post.image_sources
+    assert (
+        f'<source type="image/webp" srcset="{source.srcset}" sizes="'
+        in feed
+    ), (
+        "Убедитесь, что карточка публикации предлагает браузеру копии фото"
+        " в формате WebP."
+    )
+    assert source.srcset.endswith(" 1280w")
+    assert feed.count("<img") == 2, (
+        "Убедитесь, что в карточке публикации по-прежнему одно изображение."
+    )
+    detail = user_client.get(f"/posts/{post.id}/").content.decode()
+    assert f'srcset="{source.srcset}"' in detail
+
+    settings.BLOG_IMAGE_FORMATS = []
+    post = create_post(user_client, published_category, upload((900, 600)))
+    call_command("build_image_variants", stdout=out)
+    post.refresh_from_db()
+    assert "formats" not in post.image_variants["card"]
+    assert post.image_sources == []
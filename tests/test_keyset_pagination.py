@@ -0,0 +1,72 @@
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def same_date_posts(mixer, user, published_category):
+    pub_date = timezone.now() - timezone.timedelta(days=1)
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=pub_date,
+    )
+
+
+def walk_feed(client, url):
+    seen, cursor = [], None
+    while True:
+        response = client.get(url, {"after": cursor} if cursor else {})
+        page_obj = response.context["page_obj"]
+        seen.append([post.id for post in page_obj])
+        if not page_obj.has_next():
+            return seen, page_obj
+        cursor = page_obj.next_cursor
+
+
+@override_settings(BLOG_KEYSET_PAGINATION=True)
+def test_keyset_walk_covers_feed(user_client, same_date_posts):
+    pages, last_page = walk_feed(user_client, "/")
+    ids = [post_id for page in pages for post_id in page]
+    assert ids == sorted((post.id for post in same_date_posts), reverse=True), (
+        "Убедитесь, что курсорная пагинация выдаёт каждую публикацию ровно"
+        " один раз, в том числе при совпадающих датах публикации."
+    )
+    assert [len(page) for page in pages] == [N_PER_PAGE, N_PER_PAGE, 5]
+
+    response = user_client.get("/", {"before": last_page.previous_cursor})
+    assert [post.id for post in response.context["page_obj"]] == pages[1], (
+        "Убедитесь, что ссылка на предыдущую страницу возвращает ту же"
+        " выборку, что и при движении вперёд."
+    )
+
+
+@override_settings(BLOG_KEYSET_PAGINATION=True)
+def test_keyset_bad_cursor_falls_back(user_client, same_date_posts):
+    response = user_client.get("/", {"after": "not-a-cursor"})
+    assert response.status_code == 200
+    page_obj = response.context["page_obj"]
+    assert not page_obj.has_previous()
+    assert len(page_obj) == N_PER_PAGE
+
+
+def test_cursor_param_works_without_setting(user_client, same_date_posts):
+    first_page = user_client.get("/").context["page_obj"]
+    assert not getattr(first_page, "is_keyset", False)
+
+    with override_settings(BLOG_KEYSET_PAGINATION=True):
+        cursor = user_client.get("/").context["page_obj"].next_cursor
+    page_obj = user_client.get("/", {"after": cursor}).context["page_obj"]
+    assert getattr(page_obj, "is_keyset", False), (
+        "Убедитесь, что ссылки с курсором работают и при выключенной"
+        " курсорной пагинации."
+    )
+    expected = sorted((post.id for post in same_date_posts), reverse=True)
+    assert [post.id for post in page_obj] == expected[
+        N_PER_PAGE:2 * N_PER_PAGE]
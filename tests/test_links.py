@@ -0,0 +1,51 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.urls import clear_script_prefix, reverse, set_script_prefix
+
+from blog.links import category_url, post_url, profile_url
+
+
+@pytest.mark.parametrize("build, view_name, value", [
+    (post_url, "blog:post_detail", 42),
+    (category_url, "blog:category_posts", "travel-notes"),
+    (profile_url, "blog:profile", "user.name+tag@mail"),
+    (profile_url, "blog:profile", "кириллица"),
+    (profile_url, "blog:profile", "with space%"),
+])
+@pytest.mark.parametrize("script_prefix", ["/", "/blog/"])
+def test_links_match_reverse(build, view_name, value, script_prefix):
+    set_script_prefix(script_prefix)
+    try:
+        assert build(value) == reverse(view_name, args=[value]), (
+            "Убедитесь, что ссылки на публикации, категории и профили"
+            " совпадают с результатом reverse()."
+        )
+    finally:
+        clear_script_prefix()
+
+
+@pytest.mark.django_db
+def test_models_have_absolute_urls(post_with_published_location):
+    post = post_with_published_location
+    assert post.get_absolute_url() == f"/posts/{post.id}/"
+    assert post.category.get_absolute_url() == (
+        f"/category/{post.category.slug}/")
+    assert post.author.get_absolute_url() == (
+        f"/profile/{post.author.username}/")
+
+
+def test_settings_do_not_import_the_blog():
+    code = (
+        "import sys, blogicum.settings;"
+        " print(any(name.startswith('blog.') for name in sys.modules))"
+    )
+    project_dir = Path(__file__).resolve().parent.parent / "blogicum"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=project_dir,
+        capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False", (
+        "Убедитесь, что модуль настроек не импортирует код приложения blog."
+    )
@@ -0,0 +1,100 @@
+import hashlib
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+pytestmark = [pytest.mark.usefixtures("media_root")]
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def hashed_file():
+    return default_storage.save("post_images/photo.jpg", ContentFile(CONTENT))
+
+
+def get(client, name, **headers):
+    return client.get(f"/media/{name}", headers=headers)
+
+
+def test_hashed_file_is_immutable(client, hashed_file):
+    response = get(client, hashed_file)
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == CONTENT
+    assert response["Content-Type"] == "image/jpeg"
+    assert response["Cache-Control"] == (
+        "public, max-age=31536000, immutable"), (
+        "Убедитесь, что файлы с хешем содержимого в имени кешируются"
+        " браузером надолго."
+    )
+    assert response["ETag"] == f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+
+    response = get(client, hashed_file, if_none_match=response["ETag"])
+    assert response.status_code == 304
+    assert response["Cache-Control"].endswith("immutable")
+
+
+def test_other_files_are_revalidated(settings, client, media_root):
+    (media_root / "legacy.png").write_bytes(CONTENT)
+    response = get(client, "legacy.png")
+    assert response["Cache-Control"] == (
+        f"public, max-age={settings.BLOG_MEDIA_MAX_AGE}")
+    response = get(client, "legacy.png", if_none_match=response["ETag"])
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize("header, content_range, body", [
+    ("bytes=10-19", "bytes 10-19/10240", CONTENT[10:20]),
+    ("bytes=10230-", "bytes 10230-10239/10240", CONTENT[10230:]),
+    ("bytes=-5", "bytes 10235-10239/10240", CONTENT[-5:]),
+    ("bytes=10000-99999", "bytes 10000-10239/10240", CONTENT[10000:]),
+])
+def test_range_requests(client, hashed_file, header, content_range, body):
+    response = get(client, hashed_file, range=header)
+    assert response.status_code == 206, (
+        "Убедитесь, что медиафайлы отдаются частями по заголовку Range."
+    )
+    assert response["Content-Range"] == content_range
+    assert response["Content-Length"] == str(len(body))
+    assert b"".join(response.streaming_content) == body
+
+
+def test_unsatisfiable_and_stale_ranges(client, hashed_file):
+    response = get(client, hashed_file, range="bytes=20000-")
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */10240"
+
+    response = get(
+        client, hashed_file, range="bytes=0-9", if_range='"outdated"')
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == CONTENT
+
+
+def test_head_and_missing_files(client, hashed_file):
+    response = client.head(f"/media/{hashed_file}")
+    assert response.status_code == 200
+    assert response["Content-Length"] == str(len(CONTENT))
+    assert response.content == b""
+    assert client.get("/media/post_images/missing.jpg").status_code == 404
+    assert client.get("/media/post_images").status_code == 404
+    assert client.get("/media/..%2Fmanage.py").status_code == 404
+    assert client.post(f"/media/{hashed_file}").status_code == 405
+
+
+@pytest.mark.parametrize("mode, header, value", [
+    ("x-accel-redirect", "X-Accel-Redirect", "/protected-media/{name}"),
+    ("x-sendfile", "X-Sendfile", "{root}/{name}"),
+])
+def test_offload_to_web_server(
+        settings, client, media_root, hashed_file, mode, header, value):
+    settings.BLOG_MEDIA_OFFLOAD = mode
+    response = get(client, hashed_file)
+    assert response.status_code == 200
+    assert response[header] == value.format(
+        name=hashed_file, root=media_root), (
+        "Убедитесь, что отдачу медиафайлов можно передать веб-серверу."
+    )
+    assert response.content == b""
+    assert response["Content-Type"] == "image/jpeg"
+    assert response["Cache-Control"].endswith("immutable")
@@ -0,0 +1,91 @@
+import os
+from io import StringIO
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+
+from blog.images import image_names
+from fixtures.images import create_post, post_data, upload
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+def stored_files(media_root):
+    return sorted(
+        path.relative_to(media_root).as_posix()
+        for path in media_root.rglob("*") if path.is_file())
+
+
+def test_identical_uploads_share_files(
+        user_client, another_user_client, published_category, media_root):
+    first = create_post(user_client, published_category, upload((1500, 900)))
+    second = create_post(
+        another_user_client, published_category,
+        upload((1500, 900), name="copy.jpg"))
+    assert second.image.name == first.image.name, (
+        "Убедитесь, что одинаковые фото сохраняются в один файл."
+    )
+    assert second.image_variants == first.image_variants
+    assert stored_files(media_root) == sorted(
+        image_names(first.image_variants))
+
+
+def test_resubmitted_image_is_not_rewritten(
+        monkeypatch, user_client, published_category, media_root):
+    post = create_post(user_client, published_category, upload((1500, 900)))
+    path = media_root / post.image.name
+    os.utime(path, (0, 0))
+
+    def rewrite(storage, name, content):
+        raise AssertionError(f"{name} written again")
+
+    monkeypatch.setattr(FileSystemStorage, "_save", rewrite)
+    response = user_client.post(
+        f"/posts/{post.id}/edit/",
+        data=post_data(published_category, upload((1500, 900))))
+    assert response.status_code == 302
+    post.refresh_from_db()
+    assert (media_root / post.image.name) == path
+    assert path.stat().st_mtime > 0, (
+        "Убедитесь, что повторно использованный файл помечается как"
+        " недавний, чтобы его не удалила уборка."
+    )
+
+
+def collect(**options):
+    out = StringIO()
+    call_command("collect_unused_images", stdout=out, **options)
+    return out.getvalue()
+
+
+def test_unused_files_are_collected_after_grace(
+        settings, user_client, another_user_client, published_category,
+        media_root):
+    first = create_post(user_client, published_category, upload((1500, 900)))
+    second = create_post(
+        another_user_client, published_category, upload((1500, 900)))
+    shared = stored_files(media_root)
+    user_client.post(
+        f"/posts/{first.id}/edit/",
+        data=post_data(published_category, upload((700, 500), color="red")))
+    first.refresh_from_db()
+    second.delete()
+    files = stored_files(media_root)
+    assert files == sorted({*shared, *image_names(first.image_variants)})
+
+    collect()
+    assert stored_files(media_root) == files, (
+        "Убедитесь, что недавно сохранённые файлы не удаляются до"
+        " истечения BLOG_UNUSED_IMAGE_GRACE."
+    )
+
+    settings.BLOG_UNUSED_IMAGE_GRACE = -60
+    assert "(не удалено)" in collect(dry_run=True)
+    assert stored_files(media_root) == files
+    collect()
+    assert stored_files(media_root) == sorted(
+        image_names(first.image_variants)), (
+        "Убедитесь, что файлы, на которые больше не ссылается ни одна"
+        " публикация, удаляются командой collect_unused_images."
+    )
@@ -0,0 +1,163 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.caching import (
+    cache_shared_page, invalidate_tags, page_cache_key, tag_response
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.content.decode(), len(queries.captured_queries)
+
+
+@pytest.fixture
+def two_categories(post_with_published_location, post_with_another_category):
+    return post_with_published_location, post_with_another_category
+
+
+def test_anonymous_pages_are_cached(client, two_categories):
+    post, _ = two_categories
+    for url in ("/", f"/posts/{post.id}/",
+                f"/category/{post.category.slug}/",
+                f"/profile/{post.author.username}/"):
+        get_with_queries(client, url)
+        _, n_queries = get_with_queries(client, url)
+        assert n_queries == 0, (
+            f"Убедитесь, что страница {url} для анонимного читателя"
+            " отдаётся из кеша без запросов к базе."
+        )
+
+
+def test_logged_in_pages_are_not_cached(user_client, two_categories):
+    get_with_queries(user_client, "/")
+    _, n_queries = get_with_queries(user_client, "/")
+    assert n_queries > 0
+
+
+def test_comment_purges_only_affected_pages(
+        mixer, client, two_categories):
+    post, other_post = two_categories
+    detail, other_category = (
+        f"/posts/{post.id}/", f"/category/{other_post.category.slug}/")
+    for url in (detail, other_category):
+        get_with_queries(client, url)
+
+    comment = mixer.blend("blog.Comment", post=post, text="Свежий отзыв")
+    content, n_queries = get_with_queries(client, detail)
+    assert comment.text in content, (
+        "Убедитесь, что новый комментарий сбрасывает кеш страницы поста."
+    )
+    _, n_queries = get_with_queries(client, other_category)
+    assert n_queries == 0, (
+        "Убедитесь, что комментарий не сбрасывает кеш страниц, на которых"
+        " нет прокомментированного поста."
+    )
+
+
+def test_post_edit_purges_feeds(client, two_categories):
+    post, _ = two_categories
+    get_with_queries(client, "/")
+    post.title = "Исправленный заголовок"
+    post.save()
+    content, _ = get_with_queries(client, "/")
+    assert post.title in content
+
+
+@override_settings(BLOG_SHARE_PAGES_WITH_USERS=True)
+def test_logged_in_readers_share_page_body(
+        mixer, user, user_client, another_user, another_user_client,
+        post_with_published_location):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post, author=user, text="Мой отзыв")
+    url = f"/posts/{post.id}/"
+    get_with_queries(user_client, url)
+
+    content, n_queries = get_with_queries(another_user_client, url)
+    assert n_queries <= 2, (
+        "Убедитесь, что страница, построенная для одного пользователя,"
+        " отдаётся из кеша и другим пользователям."
+    )
+    assert f"/profile/{another_user.username}/" in content, (
+        "Убедитесь, что шапка страницы из кеша показывает текущего"
+        " пользователя."
+    )
+    assert "/edit_comment/" not in content, (
+        "Убедитесь, что ссылки на правку чужих комментариев не попадают"
+        " в страницу из кеша."
+    )
+    assert 'name="csrfmiddlewaretoken"' in content
+    assert "<!--" not in content.split("<body>")[1]
+
+    content, _ = get_with_queries(user_client, url)
+    assert f"/profile/{user.username}/" in content
+    assert "/edit_comment/" in content
+
+
+@override_settings(BLOG_SHARE_PAGES_WITH_USERS=True)
+def test_own_profile_is_not_shared(user, user_client, another_user_client):
+    url = f"/profile/{user.username}/"
+    get_with_queries(another_user_client, url)
+    content, n_queries = get_with_queries(user_client, url)
+    assert n_queries > 2
+    assert "/profile/edit/" in content, (
+        "Убедитесь, что владелец профиля видит свою страницу, а не общую"
+        " копию из кеша."
+    )
+
+
+def test_invalidation_during_render_is_not_lost():
+    renders = []
+
+    @cache_shared_page
+    def view(request):
+        renders.append(1)
+        if len(renders) == 1:
+            invalidate_tags("feed:racing")
+        return tag_response(HttpResponse(f"render {len(renders)}"),
+                            "feed:racing")
+
+    def get():
+        request = RequestFactory().get("/racing/")
+        request.user = AnonymousUser()
+        return view(request).content
+
+    assert get() == b"render 1"
+    assert get() == b"render 2", (
+        "Убедитесь, что страница, данные которой изменились во время"
+        " отрисовки, не считается актуальной."
+    )
+    assert get() == b"render 2"
+
+
+def test_revalidation_refills_page_cache(
+        settings, client, post_with_published_location):
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+    key = page_cache_key(request)
+    etag = client.get("/")["ETag"]
+
+    cache.clear()
+    assert client.get("/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert cache.get(key), (
+        "Убедитесь, что условный запрос к странице без кеша сохраняет её"
+        " в кеш."
+    )
+
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    settings.BLOG_PAGE_CACHE_STALE_TIMEOUT = 60
+    client.get("/")
+    assert client.get("/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert cache.get(key), (
+        "Убедитесь, что условный запрос к устаревшей странице обновляет её"
+        " в кеше, а не удаляет."
+    )
@@ -0,0 +1,27 @@
+import pytest
+from django.test import override_settings
+
+from blog.views import get_page_window
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_page_window_is_bounded():
+    assert get_page_window(1, 1) == [1]
+    assert get_page_window(1, 5) == [1, 2, 3, 4, 5]
+    assert get_page_window(25000, 50000) == [
+        1, None, 24997, 24998, 24999, 25000, 25001, 25002, 25003, None, 50000
+    ]
+    assert get_page_window(50000, 50000)[-4:] == [49997, 49998, 49999, 50000]
+
+
+@override_settings(BLOG_ANONYMOUS_MAX_PAGE=1)
+def test_anonymous_page_cap(
+        client, user_client, many_posts_with_published_locations):
+    assert client.get("/", {"page": 2}).status_code == 404, (
+        "Убедитесь, что анонимный посетитель не может открыть страницу ленты"
+        " дальше установленного предела."
+    )
+    content = client.get("/").content.decode()
+    assert "?page=2" not in content
+    assert user_client.get("/", {"page": 2}).status_code == 200
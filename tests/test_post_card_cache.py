@@ -0,0 +1,74 @@
+import pytest
+from django.core.cache import cache
+
+from blog.caching import post_card_key
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_card_is_cached_and_invalidated(
+        mixer, client, post_with_published_location):
+    post = post_with_published_location
+    assert "Комментарии (0)" in client.get("/").content.decode()
+    assert cache.get(post_card_key(post)), (
+        "Убедитесь, что карточка публикации кешируется."
+    )
+
+    mixer.blend("blog.Comment", post=post)
+    assert "Комментарии (1)" in client.get("/").content.decode(), (
+        "Убедитесь, что новый комментарий обновляет кешированную карточку."
+    )
+
+    post.title = "Заголовок после правки"
+    post.save()
+    assert post.title in client.get("/").content.decode()
+
+    post.refresh_from_db()
+    card_key = post_card_key(post)
+    category = post.category
+    category.title = "Новая категория"
+    category.save()
+    assert category.title in client.get("/").content.decode(), (
+        "Убедитесь, что изменение категории обновляет карточки её"
+        " публикаций."
+    )
+    assert cache.get(card_key), (
+        "Убедитесь, что карточки помечены версией категорий и местоположений,"
+        " а не удаляются по одной при их изменении."
+    )
+
+
+def test_post_card_follows_location(client, post_with_published_location):
+    post = post_with_published_location
+    location = post.location
+    assert location.name in client.get("/").content.decode()
+
+    location.name = "Новое место"
+    location.save()
+    assert location.name in client.get("/").content.decode()
+
+    location.delete()
+    feed = client.get("/").content.decode()
+    assert "Новое место" not in feed, (
+        "Убедитесь, что удаление местоположения обновляет карточки его"
+        " публикаций."
+    )
+    assert "Планета Земля" in feed
+
+
+def test_post_card_timeout_setting(
+        settings, client, post_with_published_location):
+    settings.BLOG_POST_CARD_TIMEOUT = 0
+    client.get("/")
+    assert cache.get(post_card_key(post_with_published_location)) is None
+
+
+def test_post_card_follows_author(client, post_with_published_location):
+    author = post_with_published_location.author
+    client.get("/")
+    author.username = "renamed-author"
+    author.save()
+    assert "@renamed-author" in client.get("/").content.decode(), (
+        "Убедитесь, что изменение профиля автора обновляет карточки его"
+        " публикаций."
+    )
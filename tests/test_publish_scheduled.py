@@ -0,0 +1,54 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.scheduling import next_scheduled_publication, publish_due_posts
+from blog.signals import posts_published
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_future_posts_are_hidden_until_published(future_posts):
+    assert not any(post.is_visible for post in future_posts), (
+        "Убедитесь, что отложенные публикации не видны читателям."
+    )
+    first = min(post.pub_date for post in future_posts)
+    assert next_scheduled_publication() == first
+
+    call_command("publish_scheduled", stdout=StringIO())
+    assert not type(future_posts[0]).objects.filter(is_visible=True).exists()
+
+
+def test_publish_due_posts_flips_and_notifies(future_posts):
+    received = []
+
+    def listener(sender, post_ids, **kwargs):
+        received.extend(post_ids)
+
+    posts_published.connect(listener)
+    try:
+        moment = min(post.pub_date for post in future_posts)
+        published = publish_due_posts(now=moment)
+    finally:
+        posts_published.disconnect(listener)
+
+    first = min(future_posts, key=lambda post: post.pub_date)
+    assert published == [first.id] == received, (
+        "Убедитесь, что воркер публикует ровно те посты, время которых"
+        " наступило, и сообщает об этом."
+    )
+    first.refresh_from_db()
+    assert first.is_visible
+    assert next_scheduled_publication(now=moment) > moment
+
+
+def test_publish_command_without_due_posts_is_noop(
+        post_with_published_location):
+    out = StringIO()
+    call_command("publish_scheduled", stdout=out)
+    assert out.getvalue() == ""
+    assert next_scheduled_publication(
+        now=timezone.now() - timedelta(days=1)) is None
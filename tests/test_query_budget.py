@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+# Post with author, then all comments with authors; category and location
+# come from the in-process reference cache.
+DETAIL_QUERY_BUDGET = 2
+# Session and user lookups made for a logged-in visitor.
+AUTH_QUERIES = 2
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries.captured_queries)
+
+
+@pytest.mark.parametrize("n_comments", [1, 25])
+def test_post_detail_query_budget(
+        mixer, client, user_client, post_with_published_location, n_comments):
+    from blog.references import categories, locations
+
+    post = post_with_published_location
+    mixer.cycle(n_comments).blend("blog.Comment", post=post)
+    url = f"/posts/{post.id}/"
+    categories.get(post.category_id)
+    locations.get(post.location_id)
+
+    assert count_queries(client, url) <= DETAIL_QUERY_BUDGET, (
+        "Убедитесь, что страница публикации загружает пост, его связи и"
+        " комментарии фиксированным числом запросов."
+    )
+    assert count_queries(user_client, url) <= (
+        DETAIL_QUERY_BUDGET + AUTH_QUERIES
+    ), (
+        "Убедитесь, что число запросов страницы публикации не зависит от"
+        " числа комментариев."
+    )
+
+
+@pytest.mark.parametrize("url", ["/", "/profile/{username}/"])
+def test_feed_fetches_only_card_columns(
+        client, many_posts_with_published_locations, url):
+    author = many_posts_with_published_locations[0].author
+    url = url.format(username=author.username)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    feed_sql = [
+        q["sql"] for q in queries.captured_queries
+        if 'FROM "blog_post"' in q["sql"] and "LIMIT" in q["sql"]
+    ]
+    assert len(feed_sql) == 1, (
+        "Убедитесь, что карточки ленты не догружают отложенные поля"
+        " отдельными запросами."
+    )
+    for column in ('"blog_post"."text"', '"auth_user"."password"',
+                   '"blog_category"."description"'):
+        assert column not in feed_sql[0], (
+            f"Убедитесь, что лента не загружает столбец {column}."
+        )
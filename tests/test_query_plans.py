@@ -0,0 +1,51 @@
+import pytest
+from django.db import connection
+
+from blog.views import get_posts_queryset
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite",
+        reason="Проверка планов запросов написана для SQLite.",
+    ),
+]
+
+
+def is_bad_step(step):
+    # A bare "SCAN blog_post" reads the whole table; an ordered walk of a
+    # partial feed index ("SCAN blog_post USING INDEX ...") stops at LIMIT.
+    return step == "SCAN blog_post" or step.startswith("USE TEMP B-TREE")
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.fixture
+def feed_querysets(mixer, user, published_category, another_category):
+    mixer.cycle(20).blend(
+        "blog.Post",
+        author=user,
+        category=mixer.sequence(published_category, another_category),
+    )
+    return {
+        "главная": get_posts_queryset(),
+        "категория": get_posts_queryset(posts=published_category.posts),
+        "профиль": get_posts_queryset(posts=user.posts),
+        "профиль автора": get_posts_queryset(
+            posts=user.posts, filter_published=False),
+    }
+
+
+def test_feeds_use_indexes(feed_querysets):
+    for feed, queryset in feed_querysets.items():
+        plan = explain(queryset[:10])
+        bad_steps = [step for step in plan if is_bad_step(step)]
+        assert not bad_steps, (
+            f"Запрос ленты «{feed}» не использует индекс публикаций:"
+            f" {plan}"
+        )
@@ -0,0 +1,87 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.checks import check_shared_cache
+from blog.references import categories
+from blogicum import settings as project_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+def reference_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code in (200, 404)
+    return response, [
+        q["sql"] for q in queries.captured_queries
+        if 'FROM "blog_category"' in q["sql"]
+        or 'FROM "blog_location"' in q["sql"]
+        or 'JOIN "blog_category"' in q["sql"]
+        or 'JOIN "blog_location"' in q["sql"]
+    ]
+
+
+def test_category_page_uses_reference_cache(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    url = f"/category/{post.category.slug}/"
+    reference_queries(user_client, url)
+    response, queries = reference_queries(user_client, url)
+    assert not queries, (
+        "Убедитесь, что категория и местоположения публикаций берутся из"
+        " кеша в памяти процесса, а не из базы данных."
+    )
+    assert post.location.name in response.content.decode()
+
+
+def test_category_changes_are_seen(user_client, post_with_published_location):
+    category = post_with_published_location.category
+    url = f"/category/{category.slug}/"
+    reference_queries(user_client, url)
+
+    category.is_published = False
+    category.save()
+    response, _ = reference_queries(user_client, url)
+    assert response.status_code == 404, (
+        "Убедитесь, что изменение категории сбрасывает кеш справочников."
+    )
+
+
+@override_settings(BLOG_REFERENCE_CHECK_INTERVAL=0)
+def test_other_process_changes_are_seen(post_with_published_location):
+    category = post_with_published_location.category
+    assert categories.get(category.pk).title == category.title
+
+    # Another process renames the category: its signal bumps the shared
+    # version, while this process still holds the old rows.
+    type(category).objects.filter(pk=category.pk).update(title="Новое имя")
+    cache.set(categories.version_key, 0, None)
+    assert categories.get(category.pk).title == "Новое имя"
+
+
+def test_unknown_slug_does_not_reload_table(
+        client, post_with_published_location):
+    categories.get_by("slug", post_with_published_location.category.slug)
+    _, queries = reference_queries(client, "/category/no-such-slug/")
+    assert not queries
+
+
+def test_process_local_cache_is_reported():
+    with override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://127.0.0.1:6379"}}):
+        assert check_shared_cache(None) == [], (
+            "Убедитесь, что общий для процессов кеш не вызывает"
+            " предупреждения."
+        )
+    with override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+        assert [w.id for w in check_shared_cache(None)] == ["blog.W001"]
+    with override_settings(CACHES=project_settings.CACHES):
+        assert [w.id for w in check_shared_cache(None)] == ["blog.W001"], (
+            "Убедитесь, что проверка предупреждает о FileBasedCache: его"
+            " add() не атомарен."
+        )
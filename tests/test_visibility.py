@@ -0,0 +1,47 @@
+import pytest
+
+from conftest import N_PER_FIXTURE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def visible_ids(category):
+    return set(
+        category.posts.filter(is_visible=True).values_list("id", flat=True))
+
+
+def test_post_save_sets_visibility(
+        post_with_published_location,
+        unpublished_posts_with_published_locations):
+    assert post_with_published_location.is_visible
+    assert not any(
+        post.is_visible for post in unpublished_posts_with_published_locations
+    ), "Убедитесь, что снятые с публикации посты не видны читателям."
+
+    post = post_with_published_location
+    post.is_published = False
+    post.save(update_fields=["is_published"])
+    post.refresh_from_db()
+    assert not post.is_visible
+
+
+def test_category_publishing_propagates(
+        post_with_published_location,
+        unpublished_posts_with_published_locations):
+    category = post_with_published_location.category
+    assert len(unpublished_posts_with_published_locations) == N_PER_FIXTURE
+    assert visible_ids(category) == {post_with_published_location.id}
+
+    category.is_published = False
+    category.save()
+    assert visible_ids(category) == set(), (
+        "Убедитесь, что при снятии категории с публикации её посты"
+        " перестают быть видны читателям."
+    )
+
+    category.is_published = True
+    category.save()
+    assert visible_ids(category) == {post_with_published_location.id}, (
+        "Убедитесь, что при возвращении категории в публикацию видны"
+        " только опубликованные посты."
+    )